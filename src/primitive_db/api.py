@@ -0,0 +1,263 @@
+# src/primitive_db/api.py
+
+import io
+from contextlib import contextmanager, redirect_stdout
+from functools import wraps
+
+from src.primitive_db import core
+from src.primitive_db.constants import SCRIPT_FLUSH_POLICY
+from src.primitive_db.decorators import unwrap_interactive
+from src.primitive_db.parser import parse_where
+from src.primitive_db.store import TableStore
+
+# Модуль не импортирует engine, prompt и prettytable: он рассчитан на
+# короткоживущие процессы и встраивание в приложения без консоли.
+
+
+def _call(func, *args):
+    """
+    Вызывает функцию core без консольных обёрток: ошибки поднимаются
+    исключениями (KeyError, ValueError), подтверждения не запрашиваются,
+    а сообщения для пользователя не выводятся.
+    """
+    with redirect_stdout(io.StringIO()):
+        return unwrap_interactive(func)(*args)
+
+
+def _condition(where):
+    """Принимает условие строкой, словарём {столбец: значение} или деревом."""
+    if not isinstance(where, str):
+        return where
+    with redirect_stdout(io.StringIO()):
+        condition = parse_where(where)
+    if condition is None:
+        raise ValueError(f"Некорректное условие: {where}")
+    return condition
+
+
+def _in_session(method):
+    """
+    Выполняет метод Database с состоянием core её сессии: индексы, кэш
+    и журнал другой открытой в процессе базы не затрагиваются.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with core.use_state(self.store.state):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Database:
+    """
+    Программный интерфейс к базе данных в текущем каталоге.
+    Методы принимают и возвращают обычные значения Python; условия where
+    записываются строкой в синтаксисе консоли ('age > 30 and name = Bob'),
+    словарём {столбец: значение} или деревом условий. Изменения сбрасываются
+    на диск согласно flush_policy (по умолчанию — при close) и при выходе
+    из блока with. Объект не предназначен для работы из нескольких потоков.
+    """
+
+    def __init__(self, flush_policy=SCRIPT_FLUSH_POLICY, read_only=False):
+        self.store = TableStore(flush_policy, read_only)
+
+    def _write(self):
+        if self.store.read_only:
+            raise PermissionError("Сессия открыта только для чтения.")
+
+    def _table(self, name):
+        self.store.refresh()
+        if name not in self.store.metadata:
+            raise KeyError(name)
+        return self.store.peek_table(name)
+
+    def tables(self):
+        """Возвращает список имён таблиц."""
+        self.store.refresh()
+        return list(self.store.metadata)
+
+    def columns(self, table):
+        """Возвращает схему таблицы: список пар (столбец, тип)."""
+        self._table(table)
+        return [tuple(column) for column in self.store.metadata[table]["columns"]]
+
+    @_in_session
+    def create_table(self, table, columns):
+        """Создаёт таблицу; columns — {столбец: тип} или список 'столбец:тип'."""
+        self._write()
+        if isinstance(columns, dict):
+            columns = [f"{name}:{col_type}" for name, col_type in columns.items()]
+        _call(core.create_table, self.store.metadata, table, list(columns))
+        self.store.mark_metadata_dirty()
+        self.store.after_command()
+
+    @_in_session
+    def drop_table(self, table):
+        """Удаляет таблицу вместе с данными."""
+        self._write()
+        _call(core.drop_table, self.store.metadata, table)
+        self.store.drop_table(table)
+        self.store.after_command()
+
+    @_in_session
+    def create_index(self, table, column, kind="hash"):
+        """Создаёт индекс hash или sorted по столбцу."""
+        self._write()
+        table_data = self.store.get_table(table)
+        _call(core.create_index, self.store.metadata, table, table_data, column, kind)
+        self.store.mark_metadata_dirty()
+        self.store.after_command()
+
+    @_in_session
+    def alter_table(self, table, action, column, value=None):
+        """
+        Меняет схему таблицы: ("add", "столбец:тип", по_умолчанию),
+        ("drop", "столбец") или ("rename", "столбец", "новое_имя").
+        """
+        self._write()
+        table_data = self.store.get_table(table)
+        _call(
+            core.alter_table, self.store.metadata, table, table_data,
+            action, column, value,
+        )
+        self.store.mark_metadata_dirty()
+        self.store.after_command()
+
+    @_in_session
+    def set_encoding(self, table, column, encoding):
+        """Задаёт кодирование строкового столбца: plain или dict."""
+        self._write()
+        table_data = self.store.get_table(table)
+        _call(
+            core.set_encoding, self.store.metadata, table, table_data,
+            column, encoding,
+        )
+        self.store.mark_metadata_dirty()
+        self.store.after_command()
+
+    @_in_session
+    def insert(self, table, *rows):
+        """
+        Добавляет записи: каждая — список значений без ID или словарь
+        {столбец: значение}. Возвращает количество добавленных записей.
+        """
+        self._write()
+        table_data = self.store.get_table(table)
+        count = _call(core.insert_many, self.store.metadata, table, table_data, rows)
+        self.store.mark_metadata_dirty()
+        self.store.after_command()
+        return count
+
+    @_in_session
+    def select(self, table, where=None, columns=None, limit=None, offset=0):
+        """Возвращает ленивый итератор по записям-словарям таблицы."""
+        table_data = self._table(table)
+        if not table_data:
+            return iter(())
+        return _call(
+            core.select, table_data, _condition(where), table,
+            columns, limit, offset,
+        )
+
+    @_in_session
+    def count(self, table, where=None):
+        """Возвращает число записей, при необходимости — подходящих под where."""
+        if where is None:
+            self._table(table)
+            return self.store.row_count(table)
+        return self.aggregate(table, [("count", "*")], where)[0]["count(*)"]
+
+    @_in_session
+    def aggregate(self, table, aggregates, where=None, group_by=None):
+        """
+        Вычисляет агрегаты — пары (функция, столбец), например
+        ("sum", "age"), — с группировкой group_by. Возвращает список словарей.
+        """
+        table_data = self._table(table)
+        return _call(
+            core.aggregate, self.store.metadata, table, table_data,
+            list(aggregates), _condition(where), group_by,
+        )
+
+    @_in_session
+    def join(
+        self, left, right, on, where=None, columns=None, limit=None, offset=0
+    ):
+        """
+        Соединяет таблицы по равенству столбцов on — паре имён
+        'таблица.столбец'. Возвращает ленивый итератор по записям-словарям.
+        """
+        left_data, right_data = self._table(left), self._table(right)
+        return _call(
+            core.join, self.store.metadata, left, left_data, right, right_data,
+            tuple(on), _condition(where), columns, limit, offset,
+        )
+
+    @_in_session
+    def update(self, table, values, where):
+        """Обновляет записи по условию; возвращает количество обновлённых."""
+        self._write()
+        table_data = self.store.get_table(table)
+        if not table_data:
+            return 0
+        count = _call(
+            core.update, table_data, values, _condition(where), table,
+            self.store.metadata[table],
+        )
+        self.store.after_command()
+        return count
+
+    @_in_session
+    def delete(self, table, where):
+        """
+        Удаляет записи по условию; возвращает количество удалённых.
+        Если подходящих записей нет, поднимает ValueError.
+        """
+        self._write()
+        table_data = self.store.get_table(table)
+        before = len(table_data)
+        new_data = _call(core.delete, table_data, _condition(where), table)
+        self.store.set_table(table, new_data)
+        self.store.after_command()
+        return before - len(new_data)
+
+    def begin(self):
+        """Начинает транзакцию: изменения копятся в памяти до commit."""
+        self._write()
+        self.store.begin()
+
+    def commit(self):
+        """Фиксирует транзакцию одной атомарной записью на диск."""
+        self.store.commit()
+
+    def rollback(self):
+        """Отменяет изменения, сделанные с начала транзакции."""
+        self.store.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Выполняет блок with в транзакции: при успешном завершении
+        фиксирует её, при исключении отменяет.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def flush(self):
+        """Записывает накопленные изменения на диск (вне транзакции)."""
+        self.store.flush()
+
+    def close(self):
+        """Сбрасывает изменения и освобождает базу для других писателей."""
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,329 @@
+# src/primitive_db/bench.py
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+from src.primitive_db import core
+from src.primitive_db.constants import IMPORT_BATCH_SIZE, SELECT_PAGE_SIZE
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.store import TableStore
+from src.primitive_db.utils import compact_table
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+COLUMNS = ["name:str", "age:int", "active:bool"]
+# Бюджет времени импорта точек входа (медиана, мс) и модули консоли,
+# которые программный интерфейс не должен загружать.
+STARTUP_BUDGET_MS = {"src.primitive_db.api": 25, "src.primitive_db.main": 40}
+UI_MODULES = {"prompt", "prettytable"}
+PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+@contextmanager
+def _quiet():
+    """Подавляет вывод функций core и автоматически подтверждает операции."""
+    set_auto_confirm(True)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            yield
+    finally:
+        set_auto_confirm(None)
+
+
+@contextmanager
+def _workspace():
+    """Выполняет замеры во временном каталоге, чтобы не трогать рабочую базу."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="primitive_db_bench_") as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Workload:
+    """Собирает задержки операций одного сценария и считает итоговые метрики."""
+
+    def __init__(self, name, trace_memory):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.samples = []
+        self.rows = 0
+        self.started = None
+        self.elapsed = 0
+        self.peak = None
+
+    def __enter__(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter_ns() - self.started
+        if self.trace_memory:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return False
+
+    def measure(self, func, *args, rows=1):
+        start = time.perf_counter_ns()
+        result = func(*args)
+        self.samples.append(time.perf_counter_ns() - start)
+        self.rows += rows
+        return result
+
+    def report(self):
+        seconds = self.elapsed / 1e9
+        return {
+            "workload": self.name,
+            "ops": len(self.samples),
+            "rows": self.rows,
+            "total_s": round(seconds, 6),
+            "ops_per_s": round(len(self.samples) / seconds, 2) if seconds else None,
+            "rows_per_s": round(self.rows / seconds, 2) if seconds else None,
+            "p50_us": round(_percentile(self.samples, 0.50) / 1000, 3),
+            "p99_us": round(_percentile(self.samples, 0.99) / 1000, 3),
+            "peak_traced_bytes": self.peak,
+        }
+
+
+def _synthetic_rows(size, rng):
+    names = [f"user{i}" for i in range(1000)]
+    for _ in range(size):
+        yield [rng.choice(names), rng.randrange(100), rng.random() < 0.5]
+
+
+def run_size(size, ops, seed, trace_memory):
+    """Прогоняет все сценарии на таблице из size записей."""
+    rng = random.Random(seed)
+    table = f"bench_{size}"
+    results = []
+    store = TableStore("command")
+    try:
+        with core.use_state(store.state):
+            core.create_table(store.metadata, table, COLUMNS)
+            store.mark_metadata_dirty()
+            table_data = store.get_table(table)
+
+            with Workload("bulk_insert", trace_memory) as work:
+                rows = _synthetic_rows(size, rng)
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) == IMPORT_BATCH_SIZE:
+                        work.measure(
+                            _insert_batch, store, table, batch, rows=len(batch)
+                        )
+                        batch = []
+                if batch:
+                    work.measure(_insert_batch, store, table, batch, rows=len(batch))
+            results.append(work.report())
+
+            ids = rng.sample(range(1, size + 1), min(ops, size))
+            with Workload("point_lookup", trace_memory) as work:
+                for row_id in ids:
+                    work.measure(_select, table_data, {"ID": row_id}, table)
+            results.append(work.report())
+
+            with Workload("full_scan", trace_memory) as work:
+                for threshold in range(90, 100):
+                    work.measure(
+                        _select, table_data, ("cmp", "age", ">", threshold), table
+                    )
+            results.append(work.report())
+
+            with Workload("first_page", trace_memory) as work:
+                for _ in range(10):
+                    work.measure(
+                        _select, table_data, None, table, SELECT_PAGE_SIZE,
+                        rows=SELECT_PAGE_SIZE,
+                    )
+            results.append(work.report())
+
+            with Workload("filtered_update", trace_memory) as work:
+                for age in range(10):
+                    work.measure(
+                        _update, store, table, {"active": "true"}, {"age": age}
+                    )
+            results.append(work.report())
+
+            with Workload("point_delete", trace_memory) as work:
+                for row_id in ids[: max(1, len(ids) // 10)]:
+                    work.measure(_delete, store, table, {"ID": row_id})
+            results.append(work.report())
+
+            with Workload("save", trace_memory) as work:
+                table_data = store.get_table(table)
+                work.measure(
+                    compact_table, table, table_data, store.metadata[table],
+                    rows=len(table_data),
+                )
+            results.append(work.report())
+    finally:
+        store.close()
+
+    with Workload("cold_load", trace_memory) as work:
+        cold = TableStore("command")
+        loaded = work.measure(cold.get_table, table)
+        work.rows = len(loaded)
+        cold.close()
+    results.append(work.report())
+
+    for result in results:
+        result["size"] = size
+    return results
+
+
+def _insert_batch(store, table, batch):
+    core.insert_many(store.metadata, table, store.get_table(table), batch)
+    store.mark_metadata_dirty()
+    store.after_command()
+
+
+def _select(table_data, where_clause, table, limit=None):
+    return list(core.select(table_data, where_clause, table, limit=limit))
+
+
+def _update(store, table, set_clause, where_clause):
+    core.update(store.get_table(table), set_clause, where_clause, table)
+    store.after_command()
+
+
+def _delete(store, table, where_clause):
+    table_data = core.delete(store.get_table(table), where_clause, table)
+    if table_data is not None:
+        store.set_table(table, table_data)
+    store.after_command()
+
+
+def _import_once(module):
+    """
+    Импортирует module в новом интерпретаторе с -X importtime.
+    Возвращает суммарное время импорта модуля в микросекундах
+    и множество загруженных модулей верхнего уровня.
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    cumulative = None
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        name = name.strip()
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(total)
+    return cumulative, loaded
+
+
+def measure_startup(runs):
+    """
+    Замеряет время импорта точек входа из STARTUP_BUDGET_MS в отдельных
+    процессах. Первый запуск не учитывается: он может компилировать байткод.
+    """
+    results = []
+    for module, budget in STARTUP_BUDGET_MS.items():
+        _import_once(module)
+        samples = []
+        loaded = set()
+        for _ in range(runs):
+            cumulative, modules = _import_once(module)
+            samples.append(cumulative)
+            loaded |= modules
+        median_ms = _percentile(samples, 0.5) / 1000
+        results.append({
+            "module": module,
+            "runs": runs,
+            "median_ms": round(median_ms, 3),
+            "max_ms": round(max(samples) / 1000, 3),
+            "budget_ms": budget,
+            "ui_modules": sorted(loaded & UI_MODULES),
+            "ok": median_ms <= budget and not loaded & UI_MODULES,
+        })
+    return results
+
+
+def main(argv=None):
+    """
+    Запускает замеры и печатает отчёт в формате JSON.
+    Пример: python -m src.primitive_db.bench --sizes 1000 100000 --ops 500
+    С флагом --startup замеряет только время импорта точек входа;
+    --check завершает работу с кодом 1, если бюджет превышен.
+    """
+    parser = argparse.ArgumentParser(description="Замеры основных операций БД.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="число точечных запросов на каждый размер")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", action="store_true",
+                        help="измерять пиковую память сценариев через tracemalloc")
+    parser.add_argument("--output", help="файл для отчёта вместо stdout")
+    parser.add_argument("--startup", action="store_true",
+                        help="замерить время импорта точек входа (-X importtime)")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="число запусков интерпретатора для --startup")
+    parser.add_argument("--check", action="store_true",
+                        help="с --startup: код выхода 1 при превышении бюджета")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        results = measure_startup(args.runs)
+        report = {
+            "python": sys.version.split()[0],
+            # Без кэша байткода в замер входит компиляция модулей.
+            "bytecode_cache": not os.environ.get("PYTHONDONTWRITEBYTECODE"),
+            "startup": results,
+        }
+        _write_report(report, args)
+        if args.check and not all(result["ok"] for result in results):
+            sys.exit(1)
+        return
+
+    results = []
+    with _workspace(), _quiet():
+        for size in args.sizes:
+            results.extend(run_size(size, args.ops, args.seed, args.memory))
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+    _write_report(report, args)
+
+
+def _write_report(report, args):
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
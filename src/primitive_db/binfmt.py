@@ -0,0 +1,194 @@
+# src/primitive_db/binfmt.py
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from src.primitive_db.columnar import ColumnTable, DictColumn
+
+MAGIC = b"PDB1"
+ALIGN = 8
+_PREFIX = struct.Struct("<4sI")
+
+
+def _pad(size):
+    return -size % ALIGN
+
+
+class _StrColumn:
+    """Строковый столбец в отображённом файле: смещения и куча UTF-8."""
+
+    def __init__(self, offsets, heap):
+        self.offsets = offsets
+        self.heap = heap
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        return str(self.heap[self.offsets[pos]:self.offsets[pos + 1]], "utf-8")
+
+    def __iter__(self):
+        offsets, heap = self.offsets, self.heap
+        for pos in range(len(self)):
+            yield str(heap[offsets[pos]:offsets[pos + 1]], "utf-8")
+
+    def values(self, lo, hi):
+        """Возвращает строки с позициями lo..hi-1 списком."""
+        offsets, heap = self.offsets[lo:hi + 1].tolist(), self.heap
+        return [
+            str(heap[start:end], "utf-8")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+
+def _column_values(rows, name):
+    if isinstance(rows, ColumnTable):
+        return rows.data[name]
+    return [row[name] for row in rows]
+
+
+def _encode_strings(values):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("Q", [0])
+    total = 0
+    for chunk in encoded:
+        total += len(chunk)
+        offsets.append(total)
+    return [offsets.tobytes(), b"".join(encoded)]
+
+
+def _encode_column(col_type, values, encoding="plain"):
+    """
+    Кодирует столбец: int — int64, bool — байты, str — смещения и куча,
+    а при словарном кодировании — коды uint32 и словарь различных строк.
+    """
+    if col_type == "int":
+        return [array("q", values).tobytes()]
+    if col_type == "bool":
+        return [bytes(1 if value else 0 for value in values)]
+    if encoding == "dict":
+        if not isinstance(values, DictColumn):
+            values = DictColumn.from_values(values)
+        return [bytes(values.codes), *_encode_strings(values.dictionary)]
+    return _encode_strings(values)
+
+
+def write_table(path, columns, rows, fsync=True, dict_columns=(), generation=0):
+    """
+    Записывает таблицу в двоичный формат: заголовок с описанием схемы,
+    затем столбцы фиксированной ширины и куча строк.
+    Строковые столбцы из dict_columns и столбцы DictColumn записываются
+    словарным кодированием (в заголовке — "encoding": "dict").
+    Смещения блоков отсчитываются от начала данных и выровнены по ALIGN байт.
+    fsync=False пропускает ожидание записи на диск для временных файлов.
+    generation — поколение снимка (см. utils.snapshot_generation).
+    """
+    header = {
+        "byteorder": sys.byteorder, "rows": len(rows),
+        "generation": generation, "columns": [],
+    }
+    blocks = []
+    offset = 0
+    for name, col_type in columns:
+        column = {"name": name, "type": col_type, "parts": []}
+        values = _column_values(rows, name)
+        encoding = "plain"
+        if col_type == "str" and (
+            name in dict_columns or isinstance(values, DictColumn)
+        ):
+            encoding = column["encoding"] = "dict"
+        for part in _encode_column(col_type, values, encoding):
+            column["parts"].append([offset, len(part)])
+            offset += len(part) + _pad(len(part))
+            blocks.append(part)
+        header["columns"].append(column)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    # Файл может быть отображён в память другим читателем, поэтому
+    # пишем во временный файл и подменяем старый целиком.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * _pad(_PREFIX.size + len(header_bytes)))
+        for part in blocks:
+            f.write(part)
+            f.write(b"\0" * _pad(len(part)))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Читает только заголовок двоичной таблицы: схему и число записей."""
+    with open(path, "rb") as f:
+        magic, size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"Файл {path} не является двоичной таблицей.")
+        header = json.loads(f.read(size))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"Файл {path} записан с другим порядком байтов.")
+    header["data_start"] = _PREFIX.size + size + _pad(_PREFIX.size + size)
+    return header
+
+
+def _map_columns(path, header):
+    with open(path, "rb") as f:
+        mapped = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    start = header["data_start"]
+    data = {}
+    for column in header["columns"]:
+        views = [
+            mapped[start + offset:start + offset + size]
+            for offset, size in column["parts"]
+        ]
+        if column["type"] == "int":
+            data[column["name"]] = views[0].cast("q")
+        elif column["type"] == "bool":
+            data[column["name"]] = views[0]
+        elif column.get("encoding") == "dict":
+            # Словарь невелик и разбирается сразу, коды читаются из файла.
+            dictionary = list(_StrColumn(views[1].cast("Q"), views[2]))
+            data[column["name"]] = DictColumn(views[0].cast("I"), dictionary)
+        else:
+            data[column["name"]] = _StrColumn(views[0].cast("Q"), views[1])
+    return data
+
+
+def open_table(path):
+    """
+    Открывает двоичную таблицу только для чтения через mmap.
+    Столбцы читаются с диска по мере обращения к ним, без разбора всего файла.
+    """
+    header = read_header(path)
+    columns = [(column["name"], column["type"]) for column in header["columns"]]
+    return ColumnTable.from_columns(columns, _map_columns(path, header))
+
+
+def load_table(path):
+    """Загружает двоичную таблицу в изменяемую колоночную таблицу."""
+    header = read_header(path)
+    columns = [(column["name"], column["type"]) for column in header["columns"]]
+    types = dict(columns)
+    data = {}
+    for name, column in _map_columns(path, header).items():
+        col_type = types[name]
+        if col_type == "int":
+            data[name] = array("q")
+            data[name].frombytes(column.cast("B"))
+        elif col_type == "bool":
+            data[name] = bytearray(column)
+        elif isinstance(column, DictColumn):
+            codes = array("I")
+            codes.frombytes(column.codes.cast("B"))
+            data[name] = DictColumn(codes, [sys.intern(v) for v in column.dictionary])
+        else:
+            data[name] = [sys.intern(value) for value in column]
+    return ColumnTable.from_columns(columns, data)
@@ -0,0 +1,120 @@
+# src/primitive_db/client.py
+
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from src.primitive_db.constants import SERVER_ADDRESS
+from src.primitive_db.protocol import ENCODING, encode_request, parse_address
+
+
+class Client:
+    """
+    Соединение с сервером базы данных.
+    execute отправляет одну команду и возвращает её вывод;
+    pipeline отправляет пакет команд одним блоком и читает ответы по порядку.
+    """
+
+    def __init__(self, address=SERVER_ADDRESS, timeout=None):
+        kind, target = parse_address(address)
+        if kind == "tcp":
+            self.sock = socket.create_connection(target, timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(target)
+        self.reader = self.sock.makefile("rb")
+
+    def _read_response(self):
+        header = self.reader.readline()
+        if not header:
+            raise ConnectionError("Сервер закрыл соединение.")
+        size = int(header)
+        payload = self.reader.read(size)
+        if len(payload) != size:
+            raise ConnectionError("Сервер закрыл соединение.")
+        return payload.decode(ENCODING)
+
+    def execute(self, command):
+        """Выполняет команду на сервере и возвращает её вывод."""
+        self.sock.sendall(encode_request(command))
+        return self._read_response()
+
+    def pipeline(self, commands):
+        """
+        Отправляет команды одним блоком, не дожидаясь ответов,
+        и возвращает список их выводов в том же порядке.
+        """
+        commands = list(commands)
+        self.sock.sendall(b"".join(encode_request(command) for command in commands))
+        return [self._read_response() for _ in commands]
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class ClientPool:
+    """
+    Пул соединений с сервером для многопоточных приложений.
+    Соединения создаются по мере надобности, не больше size одновременно;
+    поток, которому не хватило соединения, ждёт освобождения.
+    Соединение, на котором произошла ошибка, закрывается и не возвращается в пул.
+    """
+
+    def __init__(self, address=SERVER_ADDRESS, size=4, timeout=None):
+        self.address = address
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Выдаёт соединение из пула на время блока with."""
+        self.slots.acquire()
+        try:
+            try:
+                client = self.idle.get_nowait()
+            except queue.Empty:
+                client = Client(self.address, self.timeout)
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            self.idle.put(client)
+        finally:
+            self.slots.release()
+
+    def execute(self, command):
+        """Выполняет команду на свободном соединении пула."""
+        with self.connection() as client:
+            return client.execute(command)
+
+    def pipeline(self, commands):
+        """Выполняет пакет команд конвейером на одном соединении пула."""
+        with self.connection() as client:
+            return client.pipeline(commands)
+
+    def close(self):
+        """Закрывает простаивающие соединения пула."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,398 @@
+# src/primitive_db/columnar.py
+
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from src.primitive_db.constants import ID_COL
+from src.primitive_db.query import OPERATORS
+
+LAYOUTS = {"rows", "columnar"}
+ENCODINGS = {"plain", "dict"}
+
+
+class DictColumn:
+    """
+    Строковый столбец со словарным кодированием: каждое различное значение
+    хранится один раз в dictionary, а записи — кодами array('I'),
+    позициями значений в dictionary. Коды могут быть и отображённым
+    в память memoryview: тогда столбец доступен только для чтения.
+    """
+
+    __slots__ = ("codes", "dictionary", "lookup")
+
+    def __init__(self, codes=None, dictionary=None):
+        self.codes = array("I") if codes is None else codes
+        self.dictionary = [] if dictionary is None else dictionary
+        self.lookup = {value: code for code, value in enumerate(self.dictionary)}
+
+    @classmethod
+    def from_values(cls, values):
+        column = cls()
+        for value in values:
+            column.append(value)
+        return column
+
+    def _code(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.dictionary)
+            self.dictionary.append(sys.intern(value))
+        return code
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.dictionary[code] for code in self.codes[pos]]
+        return self.dictionary[self.codes[pos]]
+
+    def __setitem__(self, pos, value):
+        self.codes[pos] = self._code(value)
+
+    def __delitem__(self, pos):
+        del self.codes[pos]
+
+    def __iter__(self):
+        return map(self.dictionary.__getitem__, self.codes)
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def pop(self):
+        return self.dictionary[self.codes.pop()]
+
+    def values(self, lo, hi):
+        """Возвращает строки с позициями lo..hi-1 списком."""
+        return self[lo:hi]
+
+    def take(self, positions):
+        """Возвращает столбец из записей с позициями positions."""
+        codes = self.codes
+        column = DictColumn.__new__(DictColumn)
+        column.codes = array("I", [codes[i] for i in positions])
+        column.dictionary, column.lookup = self.dictionary, self.lookup
+        return column
+
+    def find(self, test, value, positions=None):
+        """
+        Возвращает позиции записей, значение которых подходит под
+        test(значение, value). Сравнение выполняется один раз
+        для каждого различного значения, записи сверяются по кодам.
+        """
+        hits = {code for code, item in enumerate(self.dictionary) if test(item, value)}
+        codes = self.codes
+        if positions is None:
+            return [i for i, code in enumerate(codes) if code in hits]
+        return [i for i in positions if codes[i] in hits]
+
+
+def _new_column(col_type, encoding="plain"):
+    """
+    Создаёт пустое хранилище столбца: int — array('q'), bool — bytearray,
+    str — список строк или DictColumn при словарном кодировании.
+    """
+    if col_type == "int":
+        return array("q")
+    if col_type == "bool":
+        return bytearray()
+    if encoding == "dict":
+        return DictColumn()
+    return []
+
+
+def _encode(col_type, value):
+    if col_type == "bool":
+        return 1 if value else 0
+    if col_type == "str":
+        return sys.intern(value)
+    return value
+
+
+def _decode(col_type, value):
+    if col_type == "bool":
+        return bool(value)
+    return value
+
+
+class RowView(Mapping):
+    """
+    Ленивое представление записи колоночной таблицы.
+    Запоминает ID записи, поэтому остаётся верным после удаления других записей.
+    """
+
+    __slots__ = ("_table", "_id", "_pos", "_generation")
+
+    def __init__(self, table, pos):
+        self._table = table
+        self._pos = pos
+        self._generation = table.generation
+        self._id = table.data[ID_COL][pos]
+
+    def _position(self):
+        table = self._table
+        if self._generation != table.generation:
+            pos = table.position(self._id)
+            if pos is None:
+                raise KeyError(self._id)
+            self._pos = pos
+            self._generation = table.generation
+        return self._pos
+
+    def __getitem__(self, name):
+        return self._table.value(self._position(), name)
+
+    def __setitem__(self, name, value):
+        self._table.set_value(self._position(), name, value)
+
+    def __iter__(self):
+        return iter(self._table.names)
+
+    def __len__(self):
+        return len(self._table.names)
+
+    def update(self, values):
+        for name, value in values.items():
+            self[name] = value
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnTable:
+    """
+    Таблица, хранящая каждый столбец схемы в компактном типизированном
+    массиве: int — array('q'), bool — bytearray, str — список интернированных
+    строк, а столбцы из dict_columns — DictColumn.
+    Записи отдаются лениво через RowView; ID хранятся по возрастанию.
+    """
+
+    def __init__(self, columns, rows=(), dict_columns=()):
+        self.names = [name for name, _ in columns]
+        self.types = dict(columns)
+        self.data = {
+            name: _new_column(col_type, "dict" if name in dict_columns else "plain")
+            for name, col_type in columns
+        }
+        self.generation = 0
+        for row in rows:
+            self.append(row)
+
+    @classmethod
+    def from_columns(cls, columns, data):
+        """Создаёт таблицу из готовых хранилищ столбцов {имя: массив}."""
+        table = cls(columns)
+        table.data.update(data)
+        return table
+
+    def __len__(self):
+        return len(self.data[ID_COL])
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [RowView(self, i) for i in range(*pos.indices(len(self)))]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("индекс записи вне диапазона")
+        return RowView(self, pos)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield RowView(self, pos)
+
+    def __delitem__(self, pos):
+        for column in self.data.values():
+            del column[pos]
+        self.generation += 1
+
+    def value(self, pos, name):
+        """Возвращает значение столбца name в записи с позицией pos."""
+        return _decode(self.types[name], self.data[name][pos])
+
+    def set_value(self, pos, name, value):
+        """Записывает значение столбца name в запись с позицией pos."""
+        try:
+            self.data[name][pos] = _encode(self.types[name], value)
+        except OverflowError as e:
+            raise ValueError(
+                f"Значение {value} не помещается в столбец {name}."
+            ) from e
+
+    def row_dict(self, pos):
+        """Собирает запись с позицией pos в обычный словарь."""
+        return {name: self.value(pos, name) for name in self.names}
+
+    def append(self, row):
+        """Добавляет запись-словарь, раскладывая значения по столбцам."""
+        values = [_encode(self.types[name], row[name]) for name in self.names]
+        if self.data[ID_COL] and values[0] <= self.data[ID_COL][-1]:
+            raise ValueError(f"{ID_COL} записей должны возрастать.")
+        for i, (name, value) in enumerate(zip(self.names, values)):
+            try:
+                self.data[name].append(value)
+            except OverflowError as e:
+                for done in self.names[:i]:
+                    self.data[done].pop()
+                raise ValueError(
+                    f"Значение {value} не помещается в столбец {name}."
+                ) from e
+
+    def position(self, row_id):
+        """Находит позицию записи по ID двоичным поиском."""
+        ids = self.data[ID_COL]
+        try:
+            pos = bisect_left(ids, row_id)
+        except TypeError:
+            return None
+        if pos < len(ids) and ids[pos] == row_id:
+            return pos
+        return None
+
+    def match(self, conditions):
+        """
+        Возвращает позиции записей, удовлетворяющих всем сравнениям
+        conditions — списку (столбец, оператор, значение).
+        Сравнения проверяются по столбцам, без сборки записей.
+        """
+        positions = None
+        for name, op, value in conditions:
+            if name not in self.data:
+                return []
+            if name == ID_COL and op == "=":
+                pos = self.position(value)
+                found = [] if pos is None else [pos]
+                if positions is not None:
+                    found = [pos for pos in found if pos in positions]
+                positions = found
+                continue
+            column = self.data[name]
+            test = OPERATORS[op]
+            try:
+                if isinstance(column, DictColumn):
+                    positions = column.find(test, value, positions)
+                elif positions is None:
+                    positions = [i for i, x in enumerate(column) if test(x, value)]
+                else:
+                    positions = [i for i in positions if test(column[i], value)]
+            except TypeError:
+                return []
+        if positions is None:
+            return range(len(self))
+        return positions
+
+    def add_column(self, name, col_type, default):
+        """Добавляет столбец, заполненный значением default, одной операцией."""
+        value = _encode(col_type, default)
+        size = len(self)
+        if col_type == "int":
+            column = array("q", [value]) * size
+        elif col_type == "bool":
+            column = bytearray([value]) * size
+        else:
+            column = [value] * size
+        self.names.append(name)
+        self.types[name] = col_type
+        self.data[name] = column
+
+    def drop_column(self, name):
+        """Удаляет столбец вместе с его массивом."""
+        self.names.remove(name)
+        del self.types[name]
+        del self.data[name]
+
+    def rename_column(self, name, new_name):
+        """Переименовывает столбец, не трогая значения."""
+        self.names[self.names.index(name)] = new_name
+        self.types[new_name] = self.types.pop(name)
+        self.data[new_name] = self.data.pop(name)
+
+    def set_encoding(self, name, encoding):
+        """Перекодирует строковый столбец: dict — словарное, plain — список строк."""
+        column = self.data[name]
+        if encoding == "dict" and not isinstance(column, DictColumn):
+            self.data[name] = DictColumn.from_values(column)
+        elif encoding == "plain" and isinstance(column, DictColumn):
+            self.data[name] = list(column)
+
+    def remove_ids(self, ids):
+        """Удаляет записи с ID из множества ids за один проход по столбцам."""
+        keep = [i for i, row_id in enumerate(self.data[ID_COL]) if row_id not in ids]
+        for name, column in self.data.items():
+            if isinstance(column, DictColumn):
+                self.data[name] = column.take(keep)
+                continue
+            kept = [column[i] for i in keep]
+            col_type = self.types[name]
+            if col_type == "int":
+                self.data[name] = array("q", kept)
+            elif col_type == "bool":
+                self.data[name] = bytearray(kept)
+            else:
+                self.data[name] = kept
+        self.generation += 1
+
+
+def to_layout(table_data, columns, layout, dict_columns=()):
+    """
+    Переводит данные таблицы в представление layout: rows или columnar.
+    Столбцы dict_columns колоночная таблица хранит словарным кодированием,
+    а в списке записей их значения интернируются: одинаковые строки
+    разделяют один объект.
+    """
+    if layout == "columnar":
+        if not isinstance(table_data, ColumnTable):
+            return ColumnTable(columns, table_data, dict_columns)
+        for name, col_type in columns:
+            if col_type == "str":
+                encoding = "dict" if name in dict_columns else "plain"
+                table_data.set_encoding(name, encoding)
+        return table_data
+    if isinstance(table_data, ColumnTable):
+        return [dict(row) for row in table_data]
+    intern_values(table_data, dict_columns)
+    return table_data
+
+
+def intern_values(rows, names):
+    """Интернирует строковые значения столбцов names в записях-словарях."""
+    intern = sys.intern
+    for name in names:
+        for row in rows:
+            value = row.get(name)
+            if isinstance(value, str):
+                row[name] = intern(value)
+
+
+def apply_alter(table_data, change):
+    """
+    Применяет изменение схемы change (запись журнала alter) к данным
+    таблицы в любом представлении: add — добавляет столбец со значением
+    по умолчанию, drop — удаляет столбец, rename — переименовывает.
+    Уже применённое изменение пропускается, поэтому повторное применение
+    безопасно. Колоночная таблица меняет только массивы столбцов.
+    """
+    action, column = change["action"], change["column"]
+    if isinstance(table_data, ColumnTable):
+        present = column in table_data.types
+        if action == "add" and not present:
+            table_data.add_column(column, change["type"], change["default"])
+        elif action == "drop" and present:
+            table_data.drop_column(column)
+        elif action == "rename" and present and change["to"] not in table_data.types:
+            table_data.rename_column(column, change["to"])
+        return
+    if action == "add":
+        default = change["default"]
+        for row in table_data:
+            row.setdefault(column, default)
+    elif action == "drop":
+        for row in table_data:
+            row.pop(column, None)
+    elif action == "rename":
+        new_name = change["to"]
+        for row in table_data:
+            if column in row and new_name not in row:
+                row[new_name] = row.pop(column)
@@ -1,6 +1,31 @@
 # src/primitive_db/constants.py
 
 META_FILE = "db_meta.json"
+COMMIT_FILE = "db_commit.json"
+WRITER_LOCK_FILE = "db_writer.lock"
 DATA_DIR = "data"
 VALID_TYPES = {"int", "str", "bool"}
-ID_COL = "ID"
\ No newline at end of file
+# Значения по умолчанию для столбцов, добавленных alter_table без значения.
+DEFAULT_VALUES = {"int": 0, "str": "", "bool": False}
+# Диапазон int в двоичном формате и колоночном представлении (int64).
+INT_MIN = -(2 ** 63)
+INT_MAX = 2 ** 63 - 1
+ID_COL = "ID"
+LOG_SUFFIX = ".log"
+LOCK_SUFFIX = ".lock"
+LOG_COMPACT_SIZE = 1024 * 1024
+FLUSH_POLICY = "command"
+SCRIPT_FLUSH_POLICY = "exit"
+CACHE_SIZE = 128
+SELECT_CACHE_ROWS = 10_000
+SELECT_PAGE_SIZE = 50
+POINT_DELETE_LIMIT = 32
+IMPORT_BATCH_SIZE = 10000
+PARALLEL_SCAN_THRESHOLD = 200_000
+PARALLEL_SCAN_WORKERS = None
+TABLE_FORMATS = {"json": ".json", "binary": ".bin"}
+METRICS_ENV = "PRIMITIVE_DB_METRICS"
+SERVER_ADDRESS = "tcp://127.0.0.1:7433"
+# Наибольшая длина команды, которую принимает сервер (в байтах):
+# пакетная вставка тысяч записей занимает одну длинную строку.
+SERVER_LINE_LIMIT = 16 * 1024 * 1024
@@ -1,17 +1,335 @@
 # src/primitive_db/core.py
 
-from src.primitive_db.constants import ID_COL, VALID_TYPES
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count, islice, repeat
+from math import inf
+
+from src.primitive_db import metrics, parallel
+from src.primitive_db.columnar import (
+    ENCODINGS,
+    LAYOUTS,
+    ColumnTable,
+    apply_alter,
+    intern_values,
+    to_layout,
+)
+from src.primitive_db.constants import (
+    CACHE_SIZE,
+    DEFAULT_VALUES,
+    ID_COL,
+    IMPORT_BATCH_SIZE,
+    INT_MAX,
+    INT_MIN,
+    POINT_DELETE_LIMIT,
+    SELECT_CACHE_ROWS,
+    TABLE_FORMATS,
+    VALID_TYPES,
+)
 from src.primitive_db.decorators import (
     confirm_action,
     create_cacher,
     handle_db_errors,
     log_time,
 )
+from src.primitive_db.query import (
+    RANGE_OPERATORS,
+    as_condition,
+    columns_of,
+    combine,
+    comparisons,
+    compile_where,
+    conjuncts,
+    equalities,
+    rename_columns,
+)
+from src.primitive_db.utils import append_table_log, batched, read_rows, write_rows
+
+
+class SessionState:
+    """
+    Состояние core одной сессии (TableStore): обработчик журнала, версии
+    таблиц, кэш select, индексы и отображения ID -> запись. У каждой
+    сессии оно своё, поэтому писатель и сессия только для чтения в одном
+    процессе не видят индексов и журнала друг друга.
+    """
+
+    _ids = count(1)
+
+    def __init__(self, journal_handler=append_table_log):
+        self.id = next(self._ids)
+        self.journal_handler = journal_handler
+        self.cache = create_cacher(CACHE_SIZE)
+        self.table_versions = {}
+        self.indexes = {}
+        self.sorted_indexes = {}
+        self.id_maps = {}
+
+
+# Функции core работают с состоянием сессии, выбранной через use_state;
+# без неё — с общим состоянием, которое пишет журнал сразу в файлы.
+_default_state = SessionState()
+_current_state = ContextVar("primitive_db_state", default=_default_state)
+
+
+def _state():
+    return _current_state.get()
+
+
+@contextmanager
+def use_state(state):
+    """Выполняет блок with с состоянием сессии state."""
+    token = _current_state.set(state)
+    try:
+        yield state
+    finally:
+        _current_state.reset(token)
 
-cache_result = create_cacher()
 
 def clear_cache():
-    cache_result.clear()
+    _state().cache.clear()
+
+
+def cache_info():
+    """Возвращает статистику кэша select текущей сессии."""
+    return _state().cache.info()
+
+
+def table_version(table_name):
+    """Возвращает номер версии содержимого таблицы."""
+    return _state().table_versions.get(table_name, 0)
+
+
+def invalidate_table(table_name):
+    """Увеличивает версию таблицы и убирает её результаты из кэша."""
+    state = _state()
+    state.table_versions[table_name] = table_version(table_name) + 1
+    state.cache.invalidate(lambda key: key[0] == table_name)
+
+
+def normalize_where(where_clause):
+    """Приводит условие where к неизменяемому виду для ключа кэша."""
+    return as_condition(where_clause) or ()
+
+
+def build_index(table_name, table_data, column):
+    """Строит хеш-индекс по столбцу: значение -> {ID: запись}."""
+    index = {}
+    for row in table_data:
+        index.setdefault(row.get(column), {})[row[ID_COL]] = row
+    _state().indexes.setdefault(table_name, {})[column] = index
+
+
+def build_sorted_index(table_name, table_data, column):
+    """
+    Строит упорядоченный индекс по столбцу: список (значение, ID, запись),
+    отсортированный по значению. Используется для условий на диапазон.
+    """
+    entries = sorted(
+        ((row.get(column), row[ID_COL], row) for row in table_data),
+        key=lambda entry: entry[:2],
+    )
+    _state().sorted_indexes.setdefault(table_name, {})[column] = entries
+
+
+def build_id_map(table_name, table_data):
+    """
+    Строит отображение ID -> запись для точечного доступа по ID.
+    Колоночной таблице отображение не нужно: она ищет ID двоичным поиском.
+    """
+    id_maps = _state().id_maps
+    if isinstance(table_data, ColumnTable):
+        id_maps.pop(table_name, None)
+        return
+    id_maps[table_name] = {row[ID_COL]: row for row in table_data}
+
+
+def drop_indexes(table_name):
+    """Удаляет все индексы таблицы и отображение по ID из памяти."""
+    state = _state()
+    state.indexes.pop(table_name, None)
+    state.sorted_indexes.pop(table_name, None)
+    state.id_maps.pop(table_name, None)
+
+
+def next_id(table_meta, table_data):
+    """
+    Возвращает следующий ID из последовательности в метаданных таблицы.
+    Если последовательность ещё не заведена, вычисляет её по данным.
+    """
+    if "next_id" not in table_meta:
+        table_meta["next_id"] = max((row[ID_COL] for row in table_data), default=0) + 1
+    return table_meta["next_id"]
+
+
+def _row_position(table_data, row_id):
+    """Находит позицию записи по ID: записи хранятся по возрастанию ID."""
+    if isinstance(table_data, ColumnTable):
+        return table_data.position(row_id)
+    pos = bisect_left(table_data, row_id, key=lambda row: row[ID_COL])
+    if pos < len(table_data) and table_data[pos][ID_COL] == row_id:
+        return pos
+    return None
+
+
+def _indexed_columns(table_name):
+    """Возвращает столбцы таблицы, по которым есть хеш- или упорядоченный индекс."""
+    state = _state()
+    return (
+        set(state.indexes.get(table_name, {}))
+        | set(state.sorted_indexes.get(table_name, {}))
+    )
+
+
+def _index_add(table_name, row, columns=None):
+    state = _state()
+    for column, index in state.indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            index.setdefault(row.get(column), {})[row[ID_COL]] = row
+    for column, entries in state.sorted_indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            insort(entries, (row.get(column), row[ID_COL], row), key=lambda e: e[:2])
+
+
+def _index_remove(table_name, row, columns=None):
+    state = _state()
+    for column, index in state.indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            bucket = index.get(row.get(column))
+            if bucket is not None:
+                bucket.pop(row[ID_COL], None)
+                if not bucket:
+                    del index[row.get(column)]
+    for column, entries in state.sorted_indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            pos = bisect_left(entries, (row.get(column), row[ID_COL]))
+            if pos < len(entries) and entries[pos][1] == row[ID_COL]:
+                del entries[pos]
+
+
+def _index_add_many(table_name, rows, columns=None):
+    """
+    Добавляет пакет записей в индексы. Большой пакет дописывается
+    в упорядоченный индекс целиком и сортируется один раз.
+    """
+    if len(rows) <= POINT_DELETE_LIMIT:
+        for row in rows:
+            _index_add(table_name, row, columns)
+        return
+    state = _state()
+    for column, index in state.indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            for row in rows:
+                index.setdefault(row.get(column), {})[row[ID_COL]] = row
+    for column, entries in state.sorted_indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            entries.extend((row.get(column), row[ID_COL], row) for row in rows)
+            entries.sort(key=lambda e: e[:2])
+
+
+def _index_remove_many(table_name, rows, columns=None):
+    """
+    Убирает пакет записей из индексов. Из упорядоченного индекса большой
+    пакет удаляется одним проходом вместо поиска каждой записи.
+    """
+    if len(rows) <= POINT_DELETE_LIMIT:
+        for row in rows:
+            _index_remove(table_name, row, columns)
+        return
+    state = _state()
+    for column, index in state.indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            for row in rows:
+                value = row.get(column)
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.pop(row[ID_COL], None)
+                    if not bucket:
+                        del index[value]
+    ids = {row[ID_COL] for row in rows}
+    for column, entries in state.sorted_indexes.get(table_name, {}).items():
+        if columns is None or column in columns:
+            entries[:] = [entry for entry in entries if entry[1] not in ids]
+
+
+def _range_bounds(entries, op, value):
+    """Возвращает границы среза упорядоченного индекса для сравнения op value."""
+    if op in ("<", "<="):
+        lo = 0
+    elif op == ">":
+        lo = bisect_right(entries, (value, inf))
+    else:
+        lo = bisect_left(entries, (value,))
+    if op in (">", ">="):
+        hi = len(entries)
+    elif op == "<":
+        hi = bisect_left(entries, (value,))
+    else:
+        hi = bisect_right(entries, (value, inf))
+    return lo, hi
+
+
+def _candidates(state, table_name, table_data, condition):
+    """
+    Возвращает записи, среди которых нужно искать подходящие под условие.
+    Используются только сравнения, объединённые через AND на верхнем уровне.
+    Равенство по ID обслуживается отображением ID -> запись. Равенства по
+    столбцам с хеш-индексом и сравнения по столбцам с упорядоченным индексом
+    дают наборы записей, из которых выбирается самый маленький.
+    Таблицу не меньше PARALLEL_SCAN_THRESHOLD записей просматривает пул
+    процессов (parallel.scan). Колоночная таблица отбирает записи
+    по столбцам, иначе возвращается вся таблица. Индексы берутся
+    из состояния сессии state.
+    """
+    eq = equalities(condition)
+    id_map = state.id_maps.get(table_name)
+    if id_map is not None and ID_COL in eq:
+        row = id_map.get(eq[ID_COL])
+        return [] if row is None else [row]
+
+    options = []
+    indexes = state.indexes.get(table_name, {})
+    for column, value in eq.items():
+        if column in indexes:
+            options.append(list(indexes[column].get(value, {}).values()))
+    sorted_indexes = state.sorted_indexes.get(table_name, {})
+    for column, op, value in comparisons(condition):
+        if column in sorted_indexes and op in RANGE_OPERATORS:
+            entries = sorted_indexes[column]
+            try:
+                lo, hi = _range_bounds(entries, op, value)
+            except TypeError:
+                return []
+            options.append([entry[2] for entry in entries[lo:hi]])
+    if options:
+        rows = min(options, key=len)
+        return sorted(rows, key=lambda row: row[ID_COL])
+    if parallel.should_scan(table_data):
+        # Сегменты parallel различаются и по сессии: версии таблиц
+        # у разных сессий независимы.
+        positions = parallel.scan(
+            (state.id, table_name), table_data, condition,
+            state.table_versions.get(table_name, 0),
+        )
+        if positions is not None:
+            return [table_data[pos] for pos in positions]
+    if isinstance(table_data, ColumnTable):
+        positions = table_data.match(comparisons(condition))
+        return [table_data[pos] for pos in positions]
+    return table_data
+
+
+def journal(table_name, records):
+    """
+    Передаёт изменения таблицы обработчику журнала текущей сессии,
+    если имя таблицы известно.
+    """
+    if table_name is not None:
+        invalidate_table(table_name)
+        _state().journal_handler(table_name, records)
+
 
 @handle_db_errors
 def create_table(metadata, table_name, columns):
@@ -32,7 +350,7 @@ def create_table(metadata, table_name, columns):
             raise ValueError(f'Некорректный тип для столбца {col_name}: {col_type}')
         table_columns.append((col_name, col_type))
 
-    metadata[table_name] = table_columns
+    metadata[table_name] = {"columns": table_columns, "indexes": []}
     print(f'Таблица "{table_name}" успешно создана со столбцами: ' +
           ", ".join(f"{name}:{typ}" for name, typ in table_columns))
     return metadata
@@ -50,6 +368,208 @@ def drop_table(metadata, table_name):
     print(f'Таблица "{table_name}" успешно удалена.')
     return metadata
 
+@handle_db_errors
+def create_index(metadata, table_name, table_data, column, kind="hash"):
+    """
+    Создаёт индекс по столбцу таблицы и записывает его в метаданные.
+    kind: hash — для равенств, sorted — для сравнений и диапазонов.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    if kind not in ("hash", "sorted"):
+        raise ValueError(
+            f"Некорректный вид индекса: {kind}. Ожидается hash или sorted."
+        )
+    table_meta = metadata[table_name]
+    if column not in (name for name, _ in table_meta["columns"]):
+        raise KeyError(f'Столбец "{column}" не существует.')
+    key = "indexes" if kind == "hash" else "sorted_indexes"
+    if column in table_meta.get(key, []):
+        raise ValueError(f'Индекс {kind} по столбцу "{column}" уже существует.')
+
+    if kind == "hash":
+        build_index(table_name, table_data, column)
+    else:
+        build_sorted_index(table_name, table_data, column)
+    table_meta.setdefault(key, []).append(column)
+    print(
+        f'Индекс {kind} по столбцу "{column}" таблицы "{table_name}" успешно создан.'
+    )
+    return metadata
+
+
+@handle_db_errors
+def alter_table(metadata, table_name, table_data, action, column, value=None):
+    """
+    Меняет схему таблицы, не перезаписывая её файлы:
+    add <имя:тип> [по умолчанию] — добавить столбец,
+    drop <столбец> — удалить столбец,
+    rename <столбец> <новое имя> — переименовать столбец.
+    Каждое изменение увеличивает версию схемы в метаданных и попадает
+    в журнал таблицы; значение по умолчанию подставляется в старые записи
+    при чтении журнала, а в загруженной таблице — сразу в памяти.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    table_meta = metadata[table_name]
+    columns = table_meta["columns"]
+    names = [name for name, _ in columns]
+    if action == "add":
+        if ":" not in column:
+            raise ValueError(f"Некорректное значение: {column}. Формат <имя>:<тип>.")
+        col_name, col_type = column.split(":", 1)
+        col_name = col_name.strip()
+        col_type = col_type.strip().lower()
+        if col_type not in VALID_TYPES:
+            raise ValueError(f"Некорректный тип для столбца {col_name}: {col_type}")
+        if col_name in names:
+            raise ValueError(f'Столбец "{col_name}" уже существует.')
+        default = DEFAULT_VALUES[col_type] if value is None else value
+        change = {
+            "action": "add", "column": col_name, "type": col_type,
+            "default": _convert_value(
+                col_name, col_type, default, fixed_width(table_meta, table_data)
+            ),
+        }
+    elif action in ("drop", "rename"):
+        col_name = column
+        if col_name not in names:
+            raise KeyError(f'Столбец "{col_name}" не существует.')
+        if col_name == ID_COL:
+            raise ValueError(f"Столбец {ID_COL} изменить нельзя.")
+        change = {"action": action, "column": col_name}
+        if action == "rename":
+            if not value:
+                raise ValueError("Не указано новое имя столбца.")
+            if value in names:
+                raise ValueError(f'Столбец "{value}" уже существует.')
+            change["to"] = value
+    else:
+        raise ValueError(
+            f"Некорректное действие: {action}. Ожидается add, drop или rename."
+        )
+
+    if action == "add":
+        columns.append((col_name, col_type))
+    elif action == "drop":
+        del columns[names.index(col_name)]
+    else:
+        position = names.index(col_name)
+        columns[position] = (value, columns[position][1])
+    state = _state()
+    for key, built in (
+        ("indexes", state.indexes), ("sorted_indexes", state.sorted_indexes),
+        ("dict_columns", {}),
+    ):
+        indexed = table_meta.get(key, [])
+        if col_name not in indexed:
+            continue
+        index = built.get(table_name, {}).pop(col_name, None)
+        if action == "drop":
+            indexed.remove(col_name)
+        else:
+            indexed[indexed.index(col_name)] = value
+            if index is not None:
+                built[table_name][value] = index
+    apply_alter(table_data, change)
+    version = table_meta.get("schema_version", 0) + 1
+    table_meta["schema_version"] = version
+    journal(table_name, [{"op": "alter", "version": version, **change}])
+    print(
+        f'Схема таблицы "{table_name}" изменена ({action} {col_name}), '
+        f"версия схемы {version}."
+    )
+    return metadata
+
+
+@handle_db_errors
+def set_layout(metadata, table_name, table_data, layout):
+    """
+    Задаёт представление таблицы в памяти: rows — список словарей,
+    columnar — типизированные массивы по столбцам.
+    Возвращает данные таблицы в новом представлении.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    if layout not in LAYOUTS:
+        raise ValueError(
+            f"Некорректное представление: {layout}. Ожидается rows или columnar."
+        )
+    table_meta = metadata[table_name]
+    table_data = to_layout(
+        table_data, table_meta["columns"], layout,
+        table_meta.get("dict_columns", ()),
+    )
+    table_meta["layout"] = layout
+    print(f'Таблица "{table_name}" хранится в памяти в представлении {layout}.')
+    return table_data
+
+
+@handle_db_errors
+def set_encoding(metadata, table_name, table_data, column, encoding):
+    """
+    Задаёт кодирование строкового столбца: plain — каждая запись хранит
+    свою строку, dict — словарное кодирование для столбцов с небольшим
+    числом различных значений. В колоночном представлении столбец хранится
+    кодами array('I') и словарём значений, в представлении rows одинаковые
+    значения разделяют один объект строки, в двоичном снимке — кодами
+    и словарём. Снимок получает новое кодирование при следующей записи.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    if encoding not in ENCODINGS:
+        raise ValueError(
+            f"Некорректное кодирование: {encoding}. Ожидается plain или dict."
+        )
+    table_meta = metadata[table_name]
+    col_type = dict(table_meta["columns"]).get(column)
+    if col_type is None:
+        raise KeyError(f'Столбец "{column}" не существует.')
+    if col_type != "str":
+        raise ValueError(
+            f'Словарное кодирование доступно только для столбцов str, а не {col_type}.'
+        )
+    dict_columns = table_meta.setdefault("dict_columns", [])
+    if encoding == "dict" and column not in dict_columns:
+        dict_columns.append(column)
+    elif encoding == "plain" and column in dict_columns:
+        dict_columns.remove(column)
+    if isinstance(table_data, ColumnTable):
+        table_data.set_encoding(column, encoding)
+    elif encoding == "dict":
+        intern_values(table_data, [column])
+    print(
+        f'Столбец "{column}" таблицы "{table_name}" '
+        f"хранится в кодировании {encoding}."
+    )
+    return metadata
+
+
+@handle_db_errors
+def set_format(metadata, table_name, table_data, fmt):
+    """
+    Задаёт формат файла-снимка таблицы: json или binary.
+    В двоичный формат нельзя перевести таблицу, где есть целые вне int64.
+    Возвращает прежний формат.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(
+            f"Некорректный формат: {fmt}. Ожидается json или binary."
+        )
+    table_meta = metadata[table_name]
+    if fmt == "binary" and not isinstance(table_data, ColumnTable):
+        for col_name, col_type in table_meta["columns"]:
+            if col_type == "int":
+                for row in table_data:
+                    _check_int(col_name, row[col_name])
+    old_format = table_meta.get("format", "json")
+    table_meta["format"] = fmt
+    print(f'Таблица "{table_name}" хранится на диске в формате {fmt}.')
+    return old_format
+
+
 def list_tables(metadata):
     if not metadata:
         print("Таблицы отсутствуют.")
@@ -58,141 +578,756 @@ def list_tables(metadata):
             print(f"- {table_name}")
 
 
+def fixed_width(table_meta, table_data=None):
+    """
+    Хранит ли таблица int фиксированной ширины (int64): в колоночном
+    представлении или в двоичном снимке.
+    """
+    if isinstance(table_data, ColumnTable):
+        return True
+    return table_meta is not None and (
+        table_meta.get("format") == "binary"
+        or table_meta.get("layout") == "columnar"
+    )
+
+
+def _check_int(col_name, value):
+    if not INT_MIN <= value <= INT_MAX:
+        raise ValueError(
+            f"Значение {value} не помещается в столбец {col_name}: "
+            f"допустимы целые от {INT_MIN} до {INT_MAX}."
+        )
+
+
+def _convert_value(col_name, col_type, value, fixed=False):
+    """
+    Приводит значение к типу столбца или сообщает о некорректном значении.
+    fixed=True дополнительно проверяет, что int помещается в int64.
+    """
+    val = value
+    try:
+        if col_type == "int":
+            val = int(val)
+        elif col_type == "bool":
+            if isinstance(val, str):
+                val = val.lower()
+                if val in ("true", "1"):
+                    val = True
+                elif val in ("false", "0"):
+                    val = False
+                else:
+                    raise ValueError(
+                       f'Некорректное значение для столбца {col_name}: {value}'
+                    )
+            else:
+                val = bool(val)
+        else:
+            val = str(val)
+    except ValueError as e:
+        raise ValueError(
+            f'Некорректное значение для столбца {col_name}: {value}'
+            ) from e
+    if fixed and col_type == "int":
+        _check_int(col_name, val)
+    return val
+
+
+def _make_record(columns, record_id, values, fixed=False):
+    """
+    Проверяет значения и собирает запись, приводя значения к типам столбцов.
+    values — список значений без ID или словарь {столбец: значение};
+    fixed — см. _convert_value.
+    """
+    if isinstance(values, dict):
+        values = [values[col_name] for col_name, _ in columns[1:]]
+    if len(values) != len(columns) - 1:
+        raise ValueError("Количество значений не совпадает с количеством столбцов.")
+
+    record = {ID_COL: record_id}
+    for i, (col_name, col_type) in enumerate(columns[1:]):
+        record[col_name] = _convert_value(col_name, col_type, values[i], fixed)
+    return record
+
+
+def _insert_rows(metadata, table_name, table_data, rows):
+    """
+    Проверяет пакет строк, затем добавляет записи в таблицу и индексы
+    и передаёт их в журнал одним блоком. Возвращает добавленные записи.
+    """
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+
+    table_meta = metadata[table_name]
+    columns = table_meta["columns"]
+    first_id = next_id(table_meta, table_data)
+    fixed = fixed_width(table_meta, table_data)
+    records = [
+        _make_record(columns, first_id + i, values, fixed)
+        for i, values in enumerate(rows)
+    ]
+    if not records:
+        return records
+    if not isinstance(table_data, ColumnTable):
+        intern_values(records, table_meta.get("dict_columns", ()))
+
+    id_map = _state().id_maps.get(table_name)
+    stored_rows = []
+    try:
+        for record in records:
+            table_data.append(record)
+            stored = table_data[-1]
+            if id_map is not None:
+                id_map[record[ID_COL]] = stored
+            stored_rows.append(stored)
+    except Exception:
+        # Пакет добавляется целиком или не добавляется вовсе.
+        for record in records[:len(stored_rows)]:
+            del table_data[-1]
+            if id_map is not None:
+                id_map.pop(record[ID_COL], None)
+        raise
+    _index_add_many(table_name, stored_rows)
+    table_meta["next_id"] = first_id + len(records)
+    # Пакет попадает в журнал одной записью: имена столбцов — один раз,
+    # значения записей — массивами в порядке столбцов.
+    names = [name for name, _ in columns]
+    journal(table_name, [{
+        "op": "insert",
+        "columns": names,
+        "rows": [[record[name] for name in names] for record in records],
+    }])
+    return records
+
+
 @handle_db_errors
 @log_time
 def insert(metadata, table_name, table_data, values):
     """Добавляет новую запись в таблицу с автоматическим ID."""
+    record = _insert_rows(metadata, table_name, table_data, [values])[0]
+    print(
+        f'Запись с {ID_COL}={record[ID_COL]} успешно добавлена '
+        f'в таблицу "{table_name}".'
+    )
+    return table_data
+
+
+@handle_db_errors
+@log_time
+def insert_many(metadata, table_name, table_data, rows):
+    """
+    Добавляет пакет записей за один проход: сначала проверяет все строки,
+    затем добавляет их и передаёт в журнал одной порцией.
+    Строка — список значений без ID или словарь {столбец: значение}.
+    Возвращает количество добавленных записей.
+    """
+    count = len(_insert_rows(metadata, table_name, table_data, rows))
+    print(f'{count} запись(ей) успешно добавлено в таблицу "{table_name}".')
+    return count
+
+
+@handle_db_errors
+@log_time
+def import_table(metadata, table_name, table_data, path, on_batch=None):
+    """
+    Загружает записи из CSV или JSON Lines пакетами по IMPORT_BATCH_SIZE строк.
+    После каждого пакета вызывает on_batch, чтобы сохранить его одной записью.
+    """
     if table_name not in metadata:
         raise KeyError(f'Таблица "{table_name}" не существует.')
 
-    columns = metadata[table_name]
-    if len(values) != len(columns) - 1:
-        raise ValueError("Количество значений не совпадает с количеством столбцов.")
+    imported = 0
+    for batch in batched(read_rows(path), IMPORT_BATCH_SIZE):
+        imported += len(_insert_rows(metadata, table_name, table_data, batch))
+        if on_batch is not None:
+            on_batch()
+    print(f'Импортировано {imported} запись(ей) в таблицу "{table_name}".')
+    return imported
 
-    record = {}
-    new_id = max((row[ID_COL] for row in table_data), default=0) + 1
-    record[ID_COL] = new_id
 
-    for i, (col_name, col_type) in enumerate(columns[1:]):
-        val = values[i]
-        try:
-            if col_type == "int":
-                val = int(val)
-            elif col_type == "bool":
-                if isinstance(val, str):
-                    val = val.lower()
-                    if val in ("true", "1"):
-                        val = True
-                    elif val in ("false", "0"):
-                        val = False
-                    else:
-                        raise ValueError(
-                           f'Некорректное значение для столбца {col_name}: {values[i]}'
-                        )
-                else:
-                    val = bool(val)
+@handle_db_errors
+@log_time
+def export_table(metadata, table_name, table_data, path):
+    """Выгружает записи таблицы в CSV или JSON Lines."""
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+
+    column_names = [name for name, _ in metadata[table_name]["columns"]]
+    exported = write_rows(path, column_names, table_data)
+    print(f'Выгружено {exported} запись(ей) из таблицы "{table_name}" в {path}.')
+    return exported
+
+
+def _select_rows(table_data, where_clause, table_name, state=None):
+    """
+    Возвращает ленивый итератор по записям таблицы, подходящим под условие
+    where. Готовый результат берётся из кэша. Новый результат попадает
+    в кэш, только если перебор дошёл до конца и подходящих записей
+    не больше SELECT_CACHE_ROWS: полная выборка большой таблицы в памяти
+    не копится. Время перебора и число строк учитываются в metrics, только
+    если сбор включён: иначе записи отдаются без замеров.
+    state — состояние сессии, если вызов идёт из ленивого перебора,
+    который мог начаться вне use_state.
+    """
+    state = state or _state()
+    key = None
+    if where_clause and table_name is not None:
+        version = state.table_versions.get(table_name, 0)
+        key = (table_name, version, normalize_where(where_clause))
+        cached = state.cache.get(key)
+        if cached is not None:
+            return iter(cached)
+
+    scanned = [0]
+    if not where_clause:
+        rows = iter(table_data)
+    else:
+        rows = _filter_rows(
+            state, table_data, where_clause, table_name, key, scanned
+        )
+    if not metrics.ENABLED:
+        return rows
+    return _timed_rows(rows, None if not where_clause else scanned)
+
+
+def _filter_rows(state, table_data, where_clause, table_name, key, scanned):
+    """
+    Перебирает кандидатов из индексов или всю таблицу и отдаёт записи,
+    подходящие под условие; scanned[0] считает проверенные записи.
+    """
+    condition = as_condition(where_clause)
+    predicate = compile_where(condition)
+    candidates = _candidates(state, table_name, table_data, condition)
+    collected = [] if key is not None else None
+    for row in candidates:
+        scanned[0] += 1
+        if not predicate(row):
+            continue
+        if collected is not None:
+            if len(collected) < SELECT_CACHE_ROWS:
+                collected.append(row)
             else:
-                val = str(val)
-        except ValueError as e:
-            raise ValueError(
-                f'Некорректное значение для столбца {col_name}: {values[i]}'
-                ) from e
-        record[col_name] = val
+                collected = None
+        yield row
+    if collected is not None:
+        state.cache.put(key, collected)
 
-    table_data.append(record)
-    print(f'Запись с {ID_COL}={new_id} успешно добавлена в таблицу "{table_name}".')
-    clear_cache()
-    return table_data
+
+def _timed_rows(rows, scanned):
+    """
+    Отдаёт записи из rows, замеряя только время их получения, а не время
+    обработки записей вызывающим кодом. scanned — счётчик проверенных
+    записей из _filter_rows или None, если проверялась каждая отданная.
+    """
+    elapsed = returned = 0
+    start = time.perf_counter_ns()
+    try:
+        for row in rows:
+            returned += 1
+            elapsed += time.perf_counter_ns() - start
+            yield row
+            start = time.perf_counter_ns()
+    finally:
+        elapsed += time.perf_counter_ns() - start
+        metrics.record("select", elapsed)
+        metrics.add(
+            "select",
+            rows_scanned=returned if scanned is None else scanned[0],
+            rows_returned=returned,
+        )
 
 
 @handle_db_errors
-@log_time
-def select(table_data, where_clause=None):
-    """Возвращает записи таблицы с возможной фильтрацией."""
+def select(
+    table_data, where_clause=None, table_name=None,
+    columns=None, limit=None, offset=0,
+):
+    """
+    Возвращает итератор по записям таблицы с возможной фильтрацией.
+    Условие where — словарь {столбец: значение} или дерево из parse_where.
+    columns — список столбцов для вывода (по умолчанию все), limit и offset
+    ограничивают выборку. Записи не копируются заранее: следующая запись
+    ищется, когда её запрашивают, поэтому первая появляется сразу.
+    Если передано имя таблицы, небольшие результаты с условием кэшируются
+    по имени, версии таблицы и условию where.
+    """
     if table_data is None or not table_data:
         raise ValueError("Таблица пуста, выбирать нечего.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("limit и offset не могут быть отрицательными.")
+    if columns:
+        known = set(table_data[0])
+        for column in columns:
+            if column not in known:
+                raise KeyError(column)
+
+    rows = _select_rows(table_data, where_clause, table_name)
+    if offset or limit is not None:
+        rows = islice(rows, offset, None if limit is None else offset + limit)
+    if columns:
+        return ({column: row[column] for column in columns} for row in rows)
+    if isinstance(table_data, ColumnTable):
+        return (dict(row) for row in rows)
+    return rows
+
+
+def _resolve_column(name, schemas):
+    """
+    Находит столбец соединения по имени 'таблица.столбец' или 'столбец'.
+    schemas — словарь {таблица: [столбцы]}. Возвращает (таблица, столбец).
+    """
+    table, dot, column = name.rpartition(".")
+    if dot:
+        if column not in schemas.get(table, ()):
+            raise KeyError(name)
+        return table, column
+    owners = [table for table, columns in schemas.items() if name in columns]
+    if not owners:
+        raise KeyError(name)
+    if len(owners) > 1:
+        raise ValueError(
+            f"Столбец {name} есть в обеих таблицах, "
+            f"укажите таблицу: <таблица>.{name}."
+        )
+    return owners[0], name
+
+
+def _join_probe(state, table_name, column):
+    """Возвращает готовый поиск записей по значению столбца или None."""
+    if column == ID_COL and table_name in state.id_maps:
+        id_map = state.id_maps[table_name]
+
+        def lookup(value):
+            row = id_map.get(value)
+            return () if row is None else (row,)
+        return lookup
+    index = state.indexes.get(table_name, {}).get(column)
+    if index is not None:
+        return lambda value: index.get(value, {}).values()
+    return None
+
 
-    key = (
-        f"{id(table_data)}:{where_clause}" if where_clause else f"{id(table_data)}:all"
+def _join_pairs(state, left, right):
+    """
+    Перебирает пары (левая запись, правая запись) с равными значениями
+    столбцов соединения. left и right — словари с ключами name, data,
+    column и condition (условие только на эту таблицу).
+    Если у таблицы есть хеш-индекс (или отображение ID) по столбцу
+    соединения, другая таблица просматривается потоком, а пары ищутся
+    в индексе; при индексах у обеих таблиц потоком идёт большая.
+    Иначе хеш-таблица строится по меньшей таблице, а большая
+    просматривается потоком. state — состояние сессии, в которой
+    вызвана join: перебор может продолжаться уже вне use_state.
+    """
+    def rows(side):
+        if side["condition"] is None:
+            return iter(side["data"])
+        return _select_rows(side["data"], side["condition"], side["name"], state)
+
+    # Потоком просматривается большая таблица; если индекс по столбцу
+    # соединения есть только у неё, таблицы меняются ролями.
+    swap = len(left["data"]) < len(right["data"])
+    stream, build = (right, left) if swap else (left, right)
+    probe = _join_probe(state, build["name"], build["column"])
+    if probe is None:
+        other = _join_probe(state, stream["name"], stream["column"])
+        if other is not None:
+            swap = not swap
+            stream, build, probe = build, stream, other
+    check = compile_where(build["condition"])
+    if probe is None:
+        table = {}
+        for row in rows(build):
+            table.setdefault(row[build["column"]], []).append(row)
+        check = compile_where(None)
+
+        def probe(value):
+            return table.get(value, ())
+
+    column = stream["column"]
+    for row in rows(stream):
+        for match in probe(row[column]):
+            if check(match):
+                yield (match, row) if swap else (row, match)
+
+
+@handle_db_errors
+def join(
+    metadata, left_name, left_data, right_name, right_data, on,
+    where_clause=None, columns=None, limit=None, offset=0,
+):
+    """
+    Лениво соединяет таблицы left_name и right_name по равенству столбцов.
+    on — пара имён столбцов вида 'таблица.столбец' (или просто 'столбец',
+    если имя однозначно). Записи результата — словари с ключами
+    'таблица.столбец'; columns задаёт выводимые столбцы в тех же формах.
+    Части условия where, относящиеся к одной таблице, применяются
+    к ней до соединения и используют её индексы.
+    """
+    for name in (left_name, right_name):
+        if name not in metadata:
+            raise KeyError(name)
+    if left_name == right_name:
+        raise ValueError("Соединение таблицы с самой собой не поддерживается.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("limit и offset не могут быть отрицательными.")
+    schemas = {
+        name: [column for column, _ in metadata[name]["columns"]]
+        for name in (left_name, right_name)
+    }
+
+    def qualify(name):
+        return ".".join(_resolve_column(name, schemas))
+
+    first, second = (_resolve_column(name, schemas) for name in on)
+    if first[0] == second[0]:
+        raise ValueError("Условие on должно связывать столбцы разных таблиц.")
+    join_columns = {first[0]: first[1], second[0]: second[1]}
+    output = [qualify(name) for name in columns] if columns else None
+
+    side_parts = {left_name: [], right_name: []}
+    common = []
+    condition = rename_columns(as_condition(where_clause), qualify)
+    for part in conjuncts(condition):
+        tables = {name.split(".", 1)[0] for name in columns_of(part)}
+        if len(tables) == 1:
+            side_parts[tables.pop()].append(part)
+        else:
+            common.append(part)
+
+    def unqualify(name):
+        return name.split(".", 1)[1]
+
+    left, right = (
+        {
+            "name": name,
+            "data": data if data is not None else [],
+            "column": join_columns[name],
+            "condition": rename_columns(combine(side_parts[name]), unqualify),
+        }
+        for name, data in ((left_name, left_data), (right_name, right_data))
     )
+    check = compile_where(combine(common))
+    state = _state()
+    labels = [
+        (name, f"{name}.{column}", column)
+        for name in (left_name, right_name) for column in schemas[name]
+    ]
+
+    def joined():
+        for left_row, right_row in _join_pairs(state, left, right):
+            sources = {left_name: left_row, right_name: right_row}
+            row = {label: sources[name][column] for name, label, column in labels}
+            if check(row):
+                if output is not None:
+                    row = {
+                        name: row[label] for name, label in zip(columns, output)
+                    }
+                yield row
+
+    rows = joined()
+    if offset or limit is not None:
+        rows = islice(rows, offset, None if limit is None else offset + limit)
+    return rows
+
+
+AGGREGATES = ("count", "sum", "min", "max", "avg")
+
+
+def _fast_aggregate(table_name, table_data, func, column, col_type):
+    """
+    Вычисляет агрегат по всей таблице без перебора записей: count — по
+    длине таблицы, min/max — по краям упорядоченного индекса, остальные
+    для колоночной таблицы — встроенными функциями над массивом столбца.
+    Возвращает (True, значение) или (False, None), если так нельзя.
+    """
+    if func == "count":
+        return True, len(table_data)
+    if not table_data:
+        return True, None
+    entries = _state().sorted_indexes.get(table_name, {}).get(column)
+    if func in ("min", "max") and entries:
+        return True, entries[0][0] if func == "min" else entries[-1][0]
+    if isinstance(table_data, ColumnTable):
+        values = table_data.data[column]
+        if func == "sum":
+            return True, sum(values)
+        if func == "avg":
+            return True, sum(values) / len(values)
+        value = min(values) if func == "min" else max(values)
+        return True, bool(value) if col_type == "bool" else value
+    return False, None
+
+
+def _hash_aggregate(tuples, group_size, specs):
+    """
+    Один проход хеш-агрегации. tuples — кортежи значений, первые
+    group_size из которых образуют ключ группы; specs — пары
+    (функция, позиция значения в кортеже). Для каждой группы хранится
+    список [число записей, состояние агрегата 1, ...].
+    """
+    groups = {}
+    for values in tuples:
+        key = values[:group_size]
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = [0] + [None] * len(specs)
+        state[0] += 1
+        for i, (func, pos) in enumerate(specs, 1):
+            if func == "count":
+                continue
+            value = values[pos]
+            current = state[i]
+            if current is None:
+                state[i] = value
+            elif func in ("sum", "avg"):
+                state[i] = current + value
+            elif func == "min":
+                if value < current:
+                    state[i] = value
+            elif value > current:
+                state[i] = value
+    return groups
+
+
+@handle_db_errors
+@log_time
+def aggregate(
+    metadata, table_name, table_data, aggregates, where_clause=None, group_by=None
+):
+    """
+    Вычисляет агрегатные функции count, sum, min, max и avg за один проход
+    по таблице с группировкой по столбцам group_by.
+    aggregates — список пар (функция, столбец); столбец '*' допустим только
+    для count. sum и avg применимы к столбцам int.
+    Возвращает список словарей: значения столбцов группировки и результаты
+    под именами вида 'sum(age)'. Без группировки результат — одна запись.
+    Условие where отбирает записи через индексы, как в select; count без
+    условия и группировки не перебирает записи.
+    """
+    if table_name not in metadata:
+        raise KeyError(table_name)
+    types = dict(metadata[table_name]["columns"])
+    group_by = list(group_by or [])
+    for column in group_by:
+        if column not in types:
+            raise KeyError(column)
+    for func, column in aggregates:
+        if func not in AGGREGATES:
+            raise ValueError(f"Неизвестная агрегатная функция: {func}")
+        if column == "*":
+            if func != "count":
+                raise ValueError(f"Функция {func} требует имя столбца.")
+        elif column not in types:
+            raise KeyError(column)
+        elif func in ("sum", "avg") and types[column] != "int":
+            raise ValueError(
+                f"Функция {func} применима только к столбцам int, "
+                f"а {column} имеет тип {types[column]}."
+            )
+    labels = [f"{func}({column})" for func, column in aggregates]
+    table_data = table_data if table_data is not None else []
+
+    if not where_clause and not group_by:
+        results = [
+            _fast_aggregate(table_name, table_data, func, column, types.get(column))
+            for func, column in aggregates
+        ]
+        if all(done for done, _ in results):
+            return [dict(zip(labels, (value for _, value in results)))]
 
-    def compute_result():
-        if not where_clause:
-            return list(table_data)
-        filtered = []
-        for row in table_data:
-            if all(row.get(k) == v for k, v in where_clause.items()):
-                filtered.append(row)
-        return filtered
+    if (
+        not where_clause and len(group_by) == 1
+        and all(func == "count" for func, _ in aggregates)
+        and group_by[0] in _state().indexes.get(table_name, {})
+    ):
+        index = _state().indexes[table_name][group_by[0]]
+        return [
+            {group_by[0]: value, **dict.fromkeys(labels, len(bucket))}
+            for value, bucket in index.items()
+        ]
 
-    return cache_result(key, compute_result)
+    needed = group_by + [
+        column for func, column in aggregates if func != "count" and column != "*"
+    ]
+    positions = {}
+    for column in needed:
+        positions.setdefault(column, len(positions))
+    names = list(positions)
+    specs = [(func, positions.get(column)) for func, column in aggregates]
+
+    scanned = 0
+    if not where_clause and isinstance(table_data, ColumnTable):
+        # Колоночная таблица отдаёт значения прямо из массивов столбцов.
+        if names:
+            tuples = zip(*(table_data.data[name] for name in names))
+        else:
+            tuples = repeat((), len(table_data))
+        scanned = len(table_data)
+    else:
+        rows = table_data
+        if where_clause:
+            condition = as_condition(where_clause)
+            predicate = compile_where(condition)
+            candidates = _candidates(_state(), table_name, table_data, condition)
+            scanned = len(candidates)
+            rows = (row for row in candidates if predicate(row))
+        else:
+            scanned = len(table_data)
+        tuples = (tuple(row[name] for name in names) for row in rows)
+    groups = _hash_aggregate(tuples, len(group_by), specs)
+    if metrics.ENABLED:
+        metrics.add("aggregate", rows_scanned=scanned, rows_returned=len(groups))
+
+    if not groups and not group_by:
+        groups = {(): [0] + [None] * len(specs)}
+    result = []
+    for key, state in groups.items():
+        row = {}
+        for column, value in zip(group_by, key):
+            row[column] = bool(value) if types[column] == "bool" else value
+        for i, (label, (func, column)) in enumerate(zip(labels, aggregates), 1):
+            value = state[i]
+            if func == "count":
+                value = state[0]
+            elif func == "avg" and value is not None:
+                value = value / state[0]
+            elif value is not None and types[column] == "bool":
+                value = bool(value)
+            row[label] = value
+        result.append(row)
+    return result
+
+
+def _coerce_values(row, set_clause, fixed=False):
+    """
+    Приводит значения set к типам соответствующих столбцов записи row.
+    fixed — см. _convert_value.
+    """
+    new_values = {}
+    for k, v in set_clause.items():
+        if k not in row:
+            raise ValueError(f'Столбец "{k}" не существует.')
+        old_value = row[k]
+        try:
+            if isinstance(old_value, bool):
+                if isinstance(v, str):
+                    v = v.lower()
+                    if v in ("true", "1"):
+                        v = True
+                    elif v in ("false", "0"):
+                        v = False
+                    else:
+                        raise ValueError
+                else:
+                    v = bool(v)
+            else:
+                v = type(old_value)(v)
+        except Exception as e:
+            raise ValueError(
+                f'Некорректное значение для столбца {k}: {v}'
+            ) from e
+        if fixed and type(v) is int:
+            _check_int(k, v)
+        new_values[k] = v
+    return new_values
 
 
 @handle_db_errors
-def update(table_data, set_clause, where_clause):
-    """Обновляет записи таблицы по условию where."""
+@log_time
+def update(table_data, set_clause, where_clause, table_name=None, table_meta=None):
+    """
+    Обновляет записи таблицы по условию where и возвращает их количество.
+    table_meta нужен, чтобы проверить диапазон int для двоичного формата.
+    """
     if table_data is None or not table_data:
         raise ValueError("Таблица пуста, обновлять нечего.")
     if not where_clause:
         raise ValueError("Условие where обязательно для update.")
     if not set_clause:
         raise ValueError("set не может быть пустым.")
+    if ID_COL in set_clause:
+        raise ValueError(f"Столбец {ID_COL} нельзя изменять.")
 
-    updated_count = 0
-    for row in table_data:
-        if all(row.get(k) == v for k, v in where_clause.items()):
-            for k, v in set_clause.items():
-                if k not in row:
-                    raise ValueError(f'Столбец "{k}" не существует.')
-                old_value = row[k]
-                try:
-                    if isinstance(old_value, bool):
-                        if isinstance(v, str):
-                            v = v.lower()
-                            if v in ("true", "1"):
-                                v = True
-                            elif v in ("false", "0"):
-                                v = False
-                            else:
-                                raise ValueError
-                        else:
-                            v = bool(v)
-                    else:
-                        v = type(old_value)(v)
-                except Exception as e:
-                    raise ValueError(
-                        f'Некорректное значение для столбца {k}: {v}'
-                    ) from e
-                row[k] = v
-            updated_count += 1
-
+    condition = as_condition(where_clause)
+    predicate = compile_where(condition)
+    candidates = _candidates(_state(), table_name, table_data, condition)
+    matched = [row for row in candidates if predicate(row)]
+    updated_count = len(matched)
+    if metrics.ENABLED:
+        metrics.add(
+            "update", rows_scanned=len(candidates), rows_changed=updated_count
+        )
     if updated_count == 0:
         print("Ошибка валидации: Нет подходящих записей для обновления.")
-        return table_data
+        return 0
+
+    # Столбцы типизированы, поэтому значения set достаточно привести
+    # к типам один раз — по первой подходящей записи.
+    new_values = _coerce_values(
+        matched[0], set_clause, fixed_width(table_meta, table_data)
+    )
+    indexed = [k for k in new_values if k in _indexed_columns(table_name)]
+    _index_remove_many(table_name, matched, indexed)
+    old_values = []
+    try:
+        for row in matched:
+            old_values.append({k: row[k] for k in new_values})
+            row.update(new_values)
+    except Exception:
+        # Записи, изменённые до ошибки, возвращаются к прежним значениям.
+        for row, values in zip(matched, old_values):
+            row.update(values)
+        raise
+    finally:
+        _index_add_many(table_name, matched, indexed)
+    updated_ids = [row[ID_COL] for row in matched]
+    journal(table_name, [{"op": "update", "ids": updated_ids, "set": new_values}])
     print(f'{updated_count} запись(и) успешно обновлены.')
-    clear_cache()
-    return table_data
+    return updated_count
 
 
 @handle_db_errors
 @confirm_action("удаление записей")
-def delete(table_data, where_clause):
+@log_time
+def delete(table_data, where_clause, table_name=None):
     """Удаляет записи таблицы по условию where."""
     if table_data is None or not table_data:
         raise ValueError("Таблица пуста, удалять нечего.")
     if not where_clause:
         raise ValueError("Условие where обязательно для delete.")
 
-    new_data = []
-    deleted_count = 0
-    for row in table_data:
-        if all(row.get(k) == v for k, v in where_clause.items()):
-            deleted_count += 1
-        else:
-            new_data.append(row)
-
+    condition = as_condition(where_clause)
+    predicate = compile_where(condition)
+    candidates = _candidates(_state(), table_name, table_data, condition)
+    deleted_rows = [row for row in candidates if predicate(row)]
+    deleted_count = len(deleted_rows)
+    if metrics.ENABLED:
+        metrics.add(
+            "delete", rows_scanned=len(candidates), rows_changed=deleted_count
+        )
     if deleted_count == 0:
         raise ValueError("Нет подходящих записей для удаления.")
+
+    deleted_ids = [row[ID_COL] for row in deleted_rows]
+    id_map = _state().id_maps.get(table_name)
+    _index_remove_many(table_name, deleted_rows)
+    if id_map is not None:
+        for row_id in deleted_ids:
+            id_map.pop(row_id, None)
+
+    positions = []
+    if deleted_count <= POINT_DELETE_LIMIT:
+        positions = [_row_position(table_data, row_id) for row_id in deleted_ids]
+    if positions and None not in positions:
+        for pos in sorted(positions, reverse=True):
+            del table_data[pos]
+        new_data = table_data
+    elif isinstance(table_data, ColumnTable):
+        table_data.remove_ids(set(deleted_ids))
+        new_data = table_data
+    else:
+        deleted_set = set(deleted_ids)
+        new_data = [row for row in table_data if row[ID_COL] not in deleted_set]
+    journal(table_name, [{"op": "delete", "ids": deleted_ids}])
     print(f'{deleted_count} запись(и) успешно удалены.')
-    clear_cache()
     return new_data
\ No newline at end of file
@@ -1,8 +1,12 @@
 # src/decorators.py
 
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
 
+from src.primitive_db import metrics
+
 
 def handle_db_errors(func):
     """Обрабатывает ошибки базы данных при вызове функции."""
@@ -21,47 +25,133 @@ def handle_db_errors(func):
             print(f"Ошибка валидации: {e}")
         except Exception as e:
             print(f"Произошла непредвиденная ошибка: {e}")
+    wrapper.interactive = True
     return wrapper
 
 
+def unwrap_interactive(func):
+    """
+    Снимает с функции обёртки handle_db_errors и confirm_action,
+    рассчитанные на консоль: ошибки поднимаются исключениями,
+    а подтверждение не запрашивается.
+    """
+    while getattr(func, "interactive", False):
+        func = func.__wrapped__
+    return func
+
+
+_auto_confirm = None
+
+
+def set_auto_confirm(answer):
+    """
+    Задаёт ответ на запросы подтверждения без участия пользователя:
+    True — подтверждать, False — отменять, None — спрашивать через input().
+    """
+    global _auto_confirm
+    _auto_confirm = answer
+
+
 def confirm_action(action_name):
     """Запрашивает подтверждение пользователя перед выполнением функции."""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            answer = input(f'Вы уверены, что хотите выполнить "{action_name}"? [y/n]: ')
+            if _auto_confirm is None:
+                answer = input(
+                    f'Вы уверены, что хотите выполнить "{action_name}"? [y/n]: '
+                )
+            else:
+                answer = "y" if _auto_confirm else "n"
             if answer.lower() != 'y':
                 print(f'Операция "{action_name}" отменена.')
                 if args:
                     return args[0]
                 return None
             return func(*args, **kwargs)
+        wrapper.interactive = True
         return wrapper
     return decorator
 
 
 def log_time(func):
-    """Выводит время выполнения функции в секундах."""
+    """
+    Замеряет время выполнения функции и передаёт его в статистику metrics.
+    Если сбор статистики выключен, возвращает функцию без обёртки.
+    """
+    if not metrics.ENABLED:
+        return func
+    name = func.__name__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.monotonic()
-        result = func(*args, **kwargs)
-        end = time.monotonic()
-        duration = end - start
-        print(f'Функция {func.__name__} выполнилась за {duration:.3f} секунд.')
-        return result
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.record(name, time.perf_counter_ns() - start)
     return wrapper
 
 
-def create_cacher():
-    """Создаёт замыкание для кэширования результатов функций."""
-    cache = {}
+def create_cacher(maxsize=None):
+    """
+    Создаёт замыкание для кэширования результатов функций.
+    Если задан maxsize, хранит не более maxsize результатов и вытесняет
+    те, к которым дольше всего не обращались (LRU).
+    Кэшем можно пользоваться из нескольких потоков: обращения к словарю
+    защищены блокировкой, а value_func вычисляется вне её.
+    """
+    cache = OrderedDict()
+    stats = {"hits": 0, "misses": 0}
+    lock = threading.Lock()
 
     def cache_result(key, value_func):
-        if key in cache:
-            return cache[key]
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                stats["hits"] += 1
+                return cache[key]
+            stats["misses"] += 1
         result = value_func()
-        cache[key] = result
+        with lock:
+            cache[key] = result
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
         return result
-    cache_result.clear = cache.clear
-    return cache_result
\ No newline at end of file
+
+    def get(key, default=None):
+        """Возвращает сохранённый результат без вычисления или default."""
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                stats["hits"] += 1
+                return cache[key]
+            stats["misses"] += 1
+            return default
+
+    def put(key, value):
+        """Сохраняет результат, вычисленный вне cache_result."""
+        with lock:
+            cache[key] = value
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+
+    def invalidate(predicate):
+        with lock:
+            for key in [key for key in cache if predicate(key)]:
+                del cache[key]
+
+    def clear():
+        with lock:
+            cache.clear()
+
+    def info():
+        with lock:
+            return {**stats, "size": len(cache), "maxsize": maxsize}
+
+    cache_result.get = get
+    cache_result.put = put
+    cache_result.clear = clear
+    cache_result.invalidate = invalidate
+    cache_result.info = info
+    return cache_result
@@ -1,26 +1,53 @@
 # src/primitive_db/engine.py
 
+import json
 import shlex
+from itertools import islice
 
-import prompt
-from prettytable import PrettyTable
-
+from src.primitive_db import metrics
+from src.primitive_db.constants import (
+    FLUSH_POLICY,
+    METRICS_ENV,
+    SCRIPT_FLUSH_POLICY,
+    SELECT_PAGE_SIZE,
+)
 from src.primitive_db.core import (
+    aggregate,
+    alter_table,
+    cache_info,
+    create_index,
     create_table,
     delete,
     drop_table,
+    export_table,
+    import_table,
     insert,
+    insert_many,
+    join,
     list_tables,
     select,
+    set_encoding,
+    set_format,
+    set_layout,
     update,
+    use_state,
 )
-from src.primitive_db.parser import parse_condition, parse_set_clause
-from src.primitive_db.utils import (
-    load_metadata,
-    load_table_data,
-    save_metadata,
-    save_table_data,
+from src.primitive_db.parser import (
+    parse_select,
+    parse_set_clause,
+    parse_values_list,
+    parse_where,
 )
+from src.primitive_db.store import TableLoadError, TableStore
+
+# prompt и prettytable нужны только консоли и выводу таблиц, поэтому
+# импортируются в функциях, которые ими пользуются: пакетному режиму,
+# серверу и программному интерфейсу (api.py) они не нужны при запуске.
+WRITE_COMMANDS = {
+    "create_table", "drop_table", "alter_table", "create_index", "set_layout",
+    "set_encoding", "set_format", "insert", "update", "delete", "import",
+    "begin", "commit", "rollback",
+}
 
 
 def print_help():
@@ -37,41 +64,90 @@ def print_help():
     print("list_tables - показать список всех таблиц")
     print("drop_table <имя_таблицы> - удалить таблицу")
     print("info <имя_таблицы> - информация о таблице")
+    print(
+        "alter_table <имя_таблицы> add <столбец:тип> [значение] | "
+        "drop <столбец> | rename <столбец> <новое_имя> - изменить схему"
+    )
+    print(
+        "create_index <имя_таблицы> <столбец> [hash|sorted] "
+        "- создать индекс по столбцу"
+    )
+    print(
+        "set_layout <имя_таблицы> <rows|columnar> "
+        "- представление таблицы в памяти"
+    )
+    print(
+        "set_encoding <имя_таблицы> <столбец> <plain|dict> "
+        "- словарное кодирование строкового столбца"
+    )
+    print(
+        "set_format <имя_таблицы> <json|binary> "
+        "- формат хранения таблицы на диске"
+    )
 
     print("\nКоманды работы с данными:")
     print(
         "insert into <имя_таблицы> values (<значение1>, <значение2>, ...) "
         "- добавить запись"
     )
+    print("  несколько групп (...), (...) добавляются одним пакетом")
     print(
-        "select from <имя_таблицы> [where <столбец = значение>] "
-        "- выбрать записи"
+        "select [<столбец1>, <столбец2>, ...|*] from <имя_таблицы> "
+        "[where <условие>] [limit N] [offset M] - выбрать записи"
+    )
+    print(f"  результат выводится страницами по {SELECT_PAGE_SIZE} записей")
+    print(
+        "  агрегаты: count(*), count|sum|min|max|avg(<столбец>) "
+        "[group by <столбец1>, ...]"
+    )
+    print(
+        "  соединение: select ... from <таблица1> join <таблица2> "
+        "on <таблица1>.<столбец> = <таблица2>.<столбец>"
     )
     print(
         "update <имя_таблицы> set <столбец = значение> "
-        "where <столбец = значение> - обновить записи"
+        "where <условие> - обновить записи"
     )
     print(
-        "delete from <имя_таблицы> where <столбец = значение> "
+        "delete from <имя_таблицы> where <условие> "
         "- удалить записи"
     )
+    print(
+        "  условие: сравнения =, !=, <, <=, >, >=, <столбец> in (...), "
+        "связки and/or и скобки"
+    )
+    print("import <имя_таблицы> <файл.csv|файл.jsonl> - загрузить записи из файла")
+    print("export <имя_таблицы> <файл.csv|файл.jsonl> - выгрузить записи в файл")
 
     print("\nСлужебные команды:")
+    print("cache - статистика кэша select")
+    print(
+        "stats [json [файл]|reset] - статистика операций: "
+        "вызовы, задержки, строки, байты"
+    )
+    print("flush - записать накопленные изменения на диск")
+    print(
+        "begin / commit / rollback - начать транзакцию, "
+        "зафиксировать её одной записью или отменить"
+    )
     print("help - показать справку")
     print("exit - выход из программы\n")
 
 
-def print_table(data):
+def print_table(data, columns=None):
     """
     Выводит список записей в виде таблицы PrettyTable.
     Параметры:
     data (list[dict]): Список словарей, где ключи — имена столбцов.
+    columns (list[str]): Порядок столбцов; по умолчанию — как в первой записи.
     Если список пустой, выводится сообщение об отсутствии записей.
     """
     if not data:
         print("Нет записей для отображения.")
         return
-    headers = data[0].keys()
+    from prettytable import PrettyTable
+
+    headers = columns or list(data[0].keys())
     table = PrettyTable()
     table.field_names = headers
     for row in data:
@@ -79,141 +155,478 @@ def print_table(data):
     print(table)
 
 
-def run():
+def print_rows(rows, columns=None, pager=None, page_size=SELECT_PAGE_SIZE):
+    """
+    Выводит записи из итератора rows страницами по page_size строк.
+    В памяти держится только текущая страница, поэтому первая страница
+    появляется сразу, сколько бы записей ни было в выборке.
+    columns задаёт порядок столбцов; pager вызывается перед каждой
+    следующей страницей и может прервать вывод, вернув False.
+    """
+    page = []
+    shown = 0
+    for row in rows:
+        if len(page) == page_size:
+            print_table(page, columns)
+            shown += len(page)
+            page = []
+            if pager is not None and not pager():
+                print(f"Показано записей: {shown}.")
+                return
+        page.append(row)
+    if page or not shown:
+        print_table(page, columns)
+        shown += len(page)
+    if shown > page_size:
+        print(f"Показано записей: {shown}.")
+
+
+def print_aggregate(store, query, pager=None):
+    """
+    Вычисляет и выводит агрегатный запрос из parse_select.
+    count(*) (или count по существующему столбцу) без условия и группировки
+    берётся из счётчика записей хранилища и не загружает таблицу.
+    """
+    table_name = query["table"]
+    if table_name not in store.metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
+    known = {name for name, _ in store.metadata[table_name]["columns"]}
+    if (
+        query["where"] is None and not query["group_by"]
+        and all(
+            func == "count" and (column == "*" or column in known)
+            for func, column in query["aggregates"]
+        )
+    ):
+        count = store.row_count(table_name)
+        rows = [dict.fromkeys(query["columns"], count)]
+    else:
+        rows = aggregate(
+            store.metadata, table_name, store.peek_table(table_name),
+            query["aggregates"], query["where"], query["group_by"],
+        )
+        if rows is None:
+            return
+    end = None if query["limit"] is None else query["offset"] + query["limit"]
+    print_rows(islice(rows, query["offset"], end), query["columns"], pager)
+
+
+def print_stats(args):
+    """
+    Выводит статистику операций из metrics.
+    stats — таблица по операциям, stats json [файл] — отчёт JSON
+    на экран или в файл, stats reset — сброс статистики.
+    """
+    if not metrics.ENABLED:
+        print(f"Сбор статистики отключён переменной окружения {METRICS_ENV}.")
+        return
+    action = args[0].lower() if args else ""
+    if action == "reset":
+        metrics.reset()
+        print("Статистика сброшена.")
+        return
+    extra = {"cache": cache_info()}
+    if action == "json":
+        if len(args) > 1:
+            try:
+                metrics.dump(args[1], extra)
+            except OSError as e:
+                print(
+                    f"Ошибка: не удалось записать статистику в {args[1]}: "
+                    f"{e.strerror or e}"
+                )
+                return
+            print(f"Статистика записана в {args[1]}.")
+        else:
+            report = {"enabled": True, "operations": metrics.snapshot(), **extra}
+            print(json.dumps(report, indent=4, ensure_ascii=False))
+        return
+
+    operations = metrics.snapshot()
+    if not operations:
+        print("Статистика пока пуста.")
+        return
+    from prettytable import PrettyTable
+
+    table = PrettyTable()
+    table.field_names = [
+        "операция", "вызовов", "среднее, мкс", "p50, мкс", "p99, мкс", "счётчики"
+    ]
+    timing = ("count", "total_ms", "mean_us", "p50_us", "p99_us", "max_us")
+    for name, entry in operations.items():
+        counters = ", ".join(
+            f"{key}={value}" for key, value in entry.items()
+            if key not in timing and key != "histogram_us"
+        )
+        table.add_row([
+            name, entry["count"], entry.get("mean_us", "-"),
+            entry.get("p50_us", "-"), entry.get("p99_us", "-"), counters,
+        ])
+    print(table)
+
+
+def run(flush_policy=FLUSH_POLICY, read_only=False):
     """
     Основной цикл интерактивного консольного интерфейса.
     Запрашивает команды у пользователя, обрабатывает их и выводит результаты.
     Поддерживаются команды управления таблицами, работы с записями и служебные команды.
+    Метаданные и данные таблиц хранятся в памяти (TableStore) и сбрасываются
+    на диск согласно flush_policy. При read_only=True изменяющие команды
+    недоступны, зато сессия не мешает другому процессу писать в базу.
     """
+    store = TableStore(flush_policy, read_only)
     print_help()
+    try:
+        _loop(store)
+    finally:
+        store.close()
 
-    while True:
-        user_input = prompt.string(">>>Введите команду: ").strip()
-        if not user_input:
-            continue
 
-        try:
-            args = shlex.split(user_input)
-        except ValueError:
-            print(f"Некорректное значение: {user_input}. Попробуйте снова.")
-            continue
-
-        command = args[0].lower()
-        metadata = load_metadata()
-
-        if command == "exit":
-            print("Выход из программы...")
-            break
-        elif command == "help":
-            print_help()
-
-        elif command == "create_table":
-            if len(args) < 2:
-                print(
-                    "Некорректное значение: отсутствует имя таблицы. "
-                    "Попробуйте снова."
-                )
-                continue
-            table_name = args[1]
-            columns = args[2:]
-            metadata = create_table(metadata, table_name, columns)
-            save_metadata(metadata)
-
-        elif command == "drop_table":
-            if len(args) != 2:
-                print(f"Некорректное значение: {' '.join(args[1:])}. Попробуйте снова.")
-                continue
-            table_name = args[1]
-            metadata_new = drop_table(metadata, table_name)
-            if metadata_new is not None:
-                metadata = metadata_new
-                save_metadata(metadata)
-
-        elif command == "list_tables":
-            list_tables(metadata)
-
-        elif command == "insert":
-            if (
-                len(args) < 4 
-                or args[1].lower() != "into" 
-                or args[3].lower() != "values"
-            ):
-                print(
-                    "Некорректная команда insert. "
-                    "Формат: insert into <table> values (<values>)"
-                )
-                continue
-            table_name = args[2]
-            values_str = user_input[user_input.find("(")+1:user_input.rfind(")")]
-            values = [v.strip().strip('"').strip("'") for v in values_str.split(",")]
-            table_data = load_table_data(table_name)
-            table_data = insert(metadata, table_name, table_data, values)
-            save_table_data(table_name, table_data)
-
-        elif command == "select":
-            if len(args) < 3 or args[1].lower() != "from":
-                print(
-                    "Некорректная команда select. "
-                    "Формат: select from <table> [where <condition>]"
-                )
-                continue
-            table_name = args[2]
-            table_data = load_table_data(table_name)
-            where_clause = None
-            if "where" in args:
-                condition_str = user_input.split("where",1)[1].strip()
-                where_clause = parse_condition(condition_str)
-            result = select(table_data, where_clause)
-            if result is not None:
-                print_table(result)
-
-        elif command == "update":
-            if len(args) < 6 or args[2].lower() != "set" or "where" not in args:
-                print(
-                    "Некорректная команда update. "
-                    "Формат: update <table> set <col=val,...> where <condition>"
-                )
-                continue
-            table_name = args[1]
-            set_str = user_input.split("set",1)[1].split("where")[0].strip()
-            where_str = user_input.split("where",1)[1].strip()
-            set_clause = parse_set_clause(set_str)
-            where_clause = parse_condition(where_str)
-            table_data = load_table_data(table_name)
-            table_data = update(table_data, set_clause, where_clause)
-            save_table_data(table_name, table_data)
-
-        elif command == "delete":
-            if len(args) < 5 or args[1].lower() != "from" or "where" not in args:
-                print(
-                "Некорректная команда delete. "
-                "Формат: delete from <table> where <condition>"
-                )
-                continue
-            table_name = args[2]
-            where_str = user_input.split("where",1)[1].strip()
-            where_clause = parse_condition(where_str)
-            table_data = load_table_data(table_name)
-            if not table_data:  # <-- минимальная проверка
-                print("Ошибка валидации: Таблица пуста, удалять нечего.")
+def run_script(lines, flush_policy=SCRIPT_FLUSH_POLICY, read_only=False):
+    """
+    Выполняет команды из lines (файл или stdin) без интерактивного ввода.
+    Пустые строки и комментарии (# или --) пропускаются.
+    Таблицы остаются в памяти на всё время выполнения; по умолчанию
+    изменения записываются на диск один раз в конце, промежуточные
+    сохранения делает команда flush или политика flush_policy.
+    """
+    store = TableStore(flush_policy, read_only)
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(("#", "--")):
                 continue
-            table_data_new = delete(table_data, where_clause)
-            if table_data_new is not None:
-                save_table_data(table_name, table_data_new)
+            if not execute(store, line):
+                break
+        else:
+            if store.in_transaction:
+                print("Скрипт закончился без commit: транзакция отменена.")
+    finally:
+        store.close()
 
-        elif command == "info":
-            if len(args) != 2:
-                print("Некорректная команда info. Формат: info <table>")
-                continue
-            table_name = args[1]
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
-            table_data = load_table_data(table_name)
-            columns = metadata[table_name]
-            print(f"Таблица: {table_name}")
-            print("Столбцы: " + ", ".join(f"{name}:{typ}" for name, typ in columns))
-            print(f"Количество записей: {len(table_data)}")
 
+def _loop(store):
+    """Читает и выполняет команды, пока пользователь не введёт exit."""
+    import prompt
+
+    while execute(store, prompt.string(">>>Введите команду: "), _next_page):
+        pass
+
+
+def _next_page():
+    """Спрашивает, показывать ли следующую страницу результата."""
+    answer = input("-- Enter — следующая страница, q — прервать: ")
+    return answer.strip().lower() != "q"
+
+
+def execute(store, user_input, pager=None):
+    """
+    Выполняет одну команду user_input над хранилищем store.
+    pager вызывается между страницами вывода select и возвращает False,
+    если показ нужно прервать; без него выводятся все страницы подряд.
+    Возвращает False, если команда завершает работу (exit), иначе True.
+    """
+    try:
+        with use_state(store.state):
+            return _execute(store, user_input, pager)
+    except TableLoadError as e:
+        print(f"Ошибка: {e}")
+        return True
+
+
+def _execute(store, user_input, pager):
+    user_input = user_input.strip()
+    if not user_input:
+        return True
+
+    try:
+        args = shlex.split(user_input)
+    except ValueError:
+        print(f"Некорректное значение: {user_input}. Попробуйте снова.")
+        return True
+
+    command = args[0].lower()
+    if store.read_only and command in WRITE_COMMANDS:
+        print(f"Команда {command} недоступна: сессия открыта только для чтения.")
+        return True
+    store.refresh()
+    metadata = store.metadata
+
+    if store.in_transaction and command in ("set_format", "flush"):
+        print(
+            f"Команда {command} недоступна внутри транзакции: "
+            "выполните commit или rollback."
+        )
+        return True
+
+    if command == "exit":
+        if store.in_transaction:
+            print("Незавершённая транзакция отменена.")
+        print("Выход из программы...")
+        return False
+    elif command == "help":
+        print_help()
+
+    elif command == "flush":
+        store.flush()
+
+    elif command in ("begin", "commit", "rollback"):
+        if len(args) != 1:
+            print(f"Некорректная команда {command}. Формат: {command}")
+            return True
+        try:
+            getattr(store, command)()
+        except ValueError as e:
+            print(f"Ошибка валидации: {e}")
+            return True
+        print({
+            "begin": "Транзакция начата.",
+            "commit": "Транзакция зафиксирована.",
+            "rollback": "Транзакция отменена.",
+        }[command])
+
+    elif command == "cache":
+        stats = cache_info()
+        print(
+            f"Кэш select: попаданий {stats['hits']}, промахов {stats['misses']}, "
+            f"записей {stats['size']} из {stats['maxsize']}"
+        )
+
+    elif command == "stats":
+        print_stats(args[1:])
+
+    elif command == "create_table":
+        if len(args) < 2:
+            print(
+                "Некорректное значение: отсутствует имя таблицы. "
+                "Попробуйте снова."
+            )
+            return True
+        table_name = args[1]
+        columns = args[2:]
+        if create_table(metadata, table_name, columns) is not None:
+            store.mark_metadata_dirty()
+
+    elif command == "drop_table":
+        if len(args) != 2:
+            print(f"Некорректное значение: {' '.join(args[1:])}. Попробуйте снова.")
+            return True
+        table_name = args[1]
+        existed = table_name in metadata
+        drop_table(metadata, table_name)
+        if existed and table_name not in metadata:
+            store.drop_table(table_name)
+
+    elif command == "create_index":
+        if len(args) not in (3, 4):
+            print(
+                "Некорректная команда create_index. "
+                "Формат: create_index <table> <column> [hash|sorted]"
+            )
+            return True
+        table_name, column = args[1], args[2]
+        kind = args[3].lower() if len(args) == 4 else "hash"
+        table_data = store.get_table(table_name)
+        if create_index(metadata, table_name, table_data, column, kind):
+            store.mark_metadata_dirty()
+
+    elif command == "alter_table":
+        action = args[2].lower() if len(args) > 2 else None
+        expected = {"add": (4, 5), "drop": (4,), "rename": (5,)}
+        if len(args) not in expected.get(action, ()):
+            print(
+                "Некорректная команда alter_table. Формат: "
+                "alter_table <table> add <column:type> [default] | "
+                "drop <column> | rename <column> <new_name>"
+            )
+            return True
+        table_name = args[1]
+        table_data = store.get_table(table_name)
+        value = args[4] if len(args) == 5 else None
+        if alter_table(metadata, table_name, table_data, action, args[3], value):
+            store.mark_metadata_dirty()
+
+    elif command == "set_layout":
+        if len(args) != 3:
+            print(
+                "Некорректная команда set_layout. "
+                "Формат: set_layout <table> <rows|columnar>"
+            )
+            return True
+        table_name, layout = args[1], args[2].lower()
+        table_data = store.get_table(table_name)
+        table_data = set_layout(metadata, table_name, table_data, layout)
+        if table_data is not None:
+            store.mark_metadata_dirty()
+            store.replace_table(table_name, table_data)
+
+    elif command == "set_encoding":
+        if len(args) != 4:
+            print(
+                "Некорректная команда set_encoding. "
+                "Формат: set_encoding <table> <column> <plain|dict>"
+            )
+            return True
+        table_name, column, encoding = args[1], args[2], args[3].lower()
+        table_data = store.get_table(table_name)
+        if set_encoding(metadata, table_name, table_data, column, encoding):
+            store.mark_metadata_dirty()
+
+    elif command == "set_format":
+        if len(args) != 3:
+            print(
+                "Некорректная команда set_format. "
+                "Формат: set_format <table> <json|binary>"
+            )
+            return True
+        table_name, fmt = args[1], args[2].lower()
+        table_data = store.get_table(table_name)
+        old_format = set_format(metadata, table_name, table_data, fmt)
+        if old_format is not None:
+            store.rewrite_snapshot(table_name, old_format)
+
+    elif command == "list_tables":
+        list_tables(metadata)
+
+    elif command == "insert":
+        if (
+            len(args) < 4 
+            or args[1].lower() != "into" 
+            or args[3].lower() != "values"
+        ):
+            print(
+                "Некорректная команда insert. "
+                "Формат: insert into <table> values (<values>)[, (<values>), ...]"
+            )
+            return True
+        table_name = args[2]
+        rows = parse_values_list(user_input[user_input.find("("):])
+        if rows is None:
+            return True
+        table_data = store.get_table(table_name)
+        if len(rows) == 1:
+            inserted = insert(metadata, table_name, table_data, rows[0])
+        else:
+            inserted = insert_many(metadata, table_name, table_data, rows)
+        if inserted is not None:
+            store.mark_metadata_dirty()
+
+    elif command == "select":
+        query = parse_select(user_input)
+        if query is None:
+            return True
+        table_name = query["table"]
+        if query["aggregates"] or query["group_by"]:
+            print_aggregate(store, query, pager)
+        elif query["join"] is not None:
+            other = query["join"]["table"]
+            rows = join(
+                metadata, table_name, store.peek_table(table_name),
+                other, store.peek_table(other), query["join"]["on"],
+                query["where"], query["columns"], query["limit"], query["offset"],
+            )
+            if rows is not None:
+                print_rows(rows, query["columns"], pager)
         else:
-            print(f"Функции {command} нет. Попробуйте снова.")
\ No newline at end of file
+            table_data = store.peek_table(table_name)
+            rows = select(
+                table_data, query["where"], table_name,
+                query["columns"], query["limit"], query["offset"],
+            )
+            columns = query["columns"]
+            if columns is None and table_name in metadata:
+                # После alter_table rename ключи старых записей идут не в
+                # порядке схемы, поэтому столбцы выводятся по метаданным.
+                columns = [name for name, _ in metadata[table_name]["columns"]]
+            if rows is not None:
+                print_rows(rows, columns, pager)
+
+    elif command == "update":
+        if len(args) < 6 or args[2].lower() != "set" or "where" not in args:
+            print(
+                "Некорректная команда update. "
+                "Формат: update <table> set <col=val,...> where <condition>"
+            )
+            return True
+        table_name = args[1]
+        set_str = user_input.split("set",1)[1].split("where")[0].strip()
+        where_str = user_input.split("where",1)[1].strip()
+        set_clause = parse_set_clause(set_str)
+        where_clause = parse_where(where_str)
+        if where_clause is None:
+            return True
+        table_data = store.get_table(table_name)
+        update(
+            table_data, set_clause, where_clause, table_name,
+            metadata.get(table_name),
+        )
+
+    elif command == "delete":
+        if len(args) < 5 or args[1].lower() != "from" or "where" not in args:
+            print(
+            "Некорректная команда delete. "
+            "Формат: delete from <table> where <condition>"
+            )
+            return True
+        table_name = args[2]
+        where_str = user_input.split("where",1)[1].strip()
+        where_clause = parse_where(where_str)
+        if where_clause is None:
+            return True
+        table_data = store.get_table(table_name)
+        if not table_data:  # <-- минимальная проверка
+            print("Ошибка валидации: Таблица пуста, удалять нечего.")
+            return True
+        table_data_new = delete(table_data, where_clause, table_name)
+        if table_data_new is not None:
+            store.set_table(table_name, table_data_new)
+
+    elif command in ("import", "export"):
+        if len(args) != 3:
+            print(
+                f"Некорректная команда {command}. "
+                f"Формат: {command} <table> <file>"
+            )
+            return True
+        table_name, path = args[1], args[2]
+        table_data = store.get_table(table_name)
+        if command == "import":
+
+            def checkpoint():
+                store.mark_metadata_dirty()
+                store.after_command()
+
+            import_table(metadata, table_name, table_data, path, checkpoint)
+        else:
+            export_table(metadata, table_name, table_data, path)
+
+    elif command == "info":
+        if len(args) != 2:
+            print("Некорректная команда info. Формат: info <table>")
+            return True
+        table_name = args[1]
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+        row_count = store.row_count(table_name)
+        columns = metadata[table_name]["columns"]
+        print(f"Таблица: {table_name}")
+        print("Столбцы: " + ", ".join(f"{name}:{typ}" for name, typ in columns))
+        indexes = metadata[table_name]["indexes"] + [
+            f"{column} (sorted)"
+            for column in metadata[table_name].get("sorted_indexes", [])
+        ]
+        print("Индексы: " + (", ".join(indexes) if indexes else "нет"))
+        dict_columns = metadata[table_name].get("dict_columns", [])
+        if dict_columns:
+            print("Словарное кодирование: " + ", ".join(dict_columns))
+        print(f"Версия схемы: {metadata[table_name].get('schema_version', 0)}")
+        print(f"Количество записей: {row_count}")
+
+    else:
+        print(f"Функции {command} нет. Попробуйте снова.")
+        return True
+
+    store.after_command()
+    return True
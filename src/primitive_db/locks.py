@@ -0,0 +1,83 @@
+# src/primitive_db/locks.py
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: рекомендательные блокировки flock недоступны
+    fcntl = None
+
+from src.primitive_db.constants import DATA_DIR, LOCK_SUFFIX, META_FILE
+
+
+class DatabaseLockedError(RuntimeError):
+    """База данных уже открыта на запись другим процессом."""
+
+
+def table_lock_path(table_name):
+    """Возвращает путь к файлу блокировки таблицы table_name."""
+    return os.path.join(DATA_DIR, f"{table_name}{LOCK_SUFFIX}")
+
+
+def meta_lock_path():
+    """Возвращает путь к файлу блокировки метаданных."""
+    return f"{META_FILE}{LOCK_SUFFIX}"
+
+
+class FileLock:
+    """
+    Рекомендательная блокировка flock на отдельном файле.
+    Данные таблиц заменяются переименованием, поэтому блокируется
+    не сам файл данных, а постоянный файл *.lock рядом с ним.
+    Разделяемую блокировку (shared=True) могут держать несколько
+    читателей одновременно, исключительную — только один писатель.
+    Блокировки не повторно входимые: повторный захват того же файла
+    в одном процессе через другой объект ждёт освобождения.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self, shared=False, blocking=True):
+        """
+        Захватывает блокировку.
+        Возвращает False, если она занята, а blocking=False.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "a")
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.file.fileno(), flags)
+        except BlockingIOError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def release(self):
+        """Освобождает блокировку."""
+        if self.file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+
+
+@contextmanager
+def locked(path, shared=False):
+    """Удерживает блокировку файла path на время блока with."""
+    lock = FileLock(path)
+    lock.acquire(shared=shared)
+    try:
+        yield
+    finally:
+        lock.release()
@@ -1,10 +1,102 @@
 #!/usr/bin/env python3
 
-from src.primitive_db.engine import run
+import argparse
+import sys
 
+from src.primitive_db.constants import (
+    FLUSH_POLICY,
+    SCRIPT_FLUSH_POLICY,
+    SERVER_ADDRESS,
+)
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import run, run_script
+from src.primitive_db.locks import DatabaseLockedError
+from src.primitive_db.protocol import parse_address
+from src.primitive_db.store import parse_flush_policy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="database", description="Примитивная база данных."
+    )
+    parser.add_argument(
+        "--script", metavar="FILE",
+        help="выполнить команды из файла без интерактивного ввода; '-' — из stdin",
+    )
+    parser.add_argument(
+        "--yes", action="store_true",
+        help="подтверждать удаление без вопросов (только с --script)",
+    )
+    parser.add_argument(
+        "--serve", metavar="ADDRESS", nargs="?", const=SERVER_ADDRESS,
+        help="запустить сервер по адресу tcp://хост:порт или unix:///путь "
+             f"(по умолчанию {SERVER_ADDRESS})",
+    )
+    parser.add_argument(
+        "--read-only", action="store_true",
+        help="открыть базу только для чтения, параллельно с другим процессом-писателем",
+    )
+    parser.add_argument(
+        "--flush-policy", metavar="POLICY",
+        help="политика записи на диск: command, exit, ops:N, "
+        "interval:S (после первой команды спустя S секунд)",
+    )
+    args = parser.parse_args(argv)
+    if args.yes and args.script is None:
+        parser.error("флаг --yes используется только вместе с --script")
+    if args.serve is not None:
+        if args.script is not None or args.read_only:
+            parser.error("--serve нельзя сочетать с --script и --read-only")
+        try:
+            parse_address(args.serve)
+        except ValueError:
+            parser.error(f"некорректный адрес сервера: {args.serve}")
+    if args.flush_policy is not None:
+        try:
+            parse_flush_policy(args.flush_policy)
+        except ValueError:
+            parser.error(f"некорректная политика записи: {args.flush_policy}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        _start(args)
+    except DatabaseLockedError as e:
+        print(f"Ошибка: {e} Запустите сессию с флагом --read-only.")
+        sys.exit(1)
+
+
+def _start(args):
+    if args.serve is not None:
+        # Сервер и asyncio загружаются только для этого режима.
+        from src.primitive_db.server import serve
+
+        serve(args.serve, args.flush_policy or FLUSH_POLICY)
+        return
+    if args.script is None:
+        run(args.flush_policy or FLUSH_POLICY, args.read_only)
+        return
+
+    flush_policy = args.flush_policy or SCRIPT_FLUSH_POLICY
+    if args.yes:
+        set_auto_confirm(True)
+    elif args.script == "-":
+        # stdin занят командами скрипта, спросить подтверждение негде.
+        set_auto_confirm(False)
+
+    if args.script == "-":
+        run_script(sys.stdin, flush_policy, args.read_only)
+        return
+    try:
+        script = open(args.script, "r", encoding="utf-8")
+    except OSError as e:
+        print(f"Ошибка: не удалось открыть скрипт {args.script}: {e.strerror}")
+        sys.exit(1)
+    with script:
+        run_script(script, flush_policy, args.read_only)
 
-def main():
-    run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
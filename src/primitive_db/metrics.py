@@ -0,0 +1,107 @@
+# src/primitive_db/metrics.py
+
+import json
+import os
+
+from src.primitive_db.constants import METRICS_ENV
+
+# Переключатель читается один раз при импорте: если сбор выключен,
+# декоратор log_time возвращает функции без обёртки, а счётчики
+# пропускаются проверкой одного флага.
+ENABLED = os.environ.get(METRICS_ENV, "1") != "0"
+
+_operations = {}
+
+
+def _new_stats():
+    return {"count": 0, "total_ns": 0, "max_ns": 0, "buckets": {}, "counters": {}}
+
+
+def _stats(name):
+    stats = _operations.get(name)
+    if stats is None:
+        stats = _operations[name] = _new_stats()
+    return stats
+
+
+def record(name, elapsed_ns):
+    """
+    Учитывает один вызов операции name длительностью elapsed_ns наносекунд.
+    Гистограмма задержек хранит число вызовов по степеням двойки:
+    корзина k содержит вызовы длительностью меньше 2**k нс.
+    """
+    stats = _stats(name)
+    stats["count"] += 1
+    stats["total_ns"] += elapsed_ns
+    if elapsed_ns > stats["max_ns"]:
+        stats["max_ns"] = elapsed_ns
+    bucket = elapsed_ns.bit_length()
+    stats["buckets"][bucket] = stats["buckets"].get(bucket, 0) + 1
+
+
+def add(name, **counts):
+    """Увеличивает счётчики операции name: строки, байты и т.п."""
+    counters = _stats(name)["counters"]
+    for counter, value in counts.items():
+        counters[counter] = counters.get(counter, 0) + value
+
+
+def _percentile(stats, fraction):
+    """
+    Оценивает перцентиль по гистограмме как верхнюю границу корзины,
+    но не больше максимального замеченного времени.
+    """
+    rank = fraction * stats["count"]
+    seen = 0
+    for bucket in sorted(stats["buckets"]):
+        seen += stats["buckets"][bucket]
+        if seen >= rank:
+            return min(2 ** bucket, stats["max_ns"])
+    return stats["max_ns"]
+
+
+def snapshot():
+    """
+    Возвращает накопленную статистику в виде словаря, пригодного для JSON:
+    для каждой операции — число вызовов, суммарное, среднее, максимальное
+    время, оценки p50/p99 в микросекундах, гистограмму и счётчики.
+    """
+    result = {}
+    for name, stats in sorted(_operations.items()):
+        count = stats["count"]
+        entry = {"count": count}
+        if count:
+            entry.update({
+                "total_ms": round(stats["total_ns"] / 1e6, 3),
+                "mean_us": round(stats["total_ns"] / count / 1000, 3),
+                "p50_us": round(_percentile(stats, 0.50) / 1000, 3),
+                "p99_us": round(_percentile(stats, 0.99) / 1000, 3),
+                "max_us": round(stats["max_ns"] / 1000, 3),
+                "histogram_us": {
+                    f"<{2 ** bucket / 1000:g}": calls
+                    for bucket, calls in sorted(stats["buckets"].items())
+                },
+            })
+        entry.update(stats["counters"])
+        result[name] = entry
+    return result
+
+
+def dump(path, extra=None):
+    """
+    Записывает статистику в JSON-файл path через временный файл;
+    extra добавляется к отчёту.
+    """
+    # utils сам импортирует metrics, поэтому импорт откладывается до вызова.
+    from src.primitive_db.utils import atomic_write
+
+    report = {"enabled": ENABLED, "operations": snapshot()}
+    if extra:
+        report.update(extra)
+    with atomic_write(path) as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+def reset():
+    """Сбрасывает всю накопленную статистику."""
+    _operations.clear()
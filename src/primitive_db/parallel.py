@@ -0,0 +1,268 @@
+# src/primitive_db/parallel.py
+
+import atexit
+import os
+import threading
+from array import array
+
+from src.primitive_db import binfmt
+from src.primitive_db.columnar import ColumnTable
+from src.primitive_db.constants import (
+    ID_COL,
+    PARALLEL_SCAN_THRESHOLD,
+    PARALLEL_SCAN_WORKERS,
+)
+from src.primitive_db.query import OPERATORS, columns_of
+
+CHUNKS_PER_WORKER = 4
+
+_executor = None
+# Сервер выполняет читающие команды в нескольких потоках: пул и сегменты
+# общие, поэтому их создание и удаление выполняются под блокировкой.
+_lock = threading.Lock()
+# Сегменты по имени таблицы: {"key", "path", "refs"}. Сегмент, заменённый
+# новым, удаляется, когда его перестанут использовать все просмотры.
+_segments = {}
+_retired = []
+
+
+def worker_count():
+    """Возвращает число процессов для параллельного просмотра."""
+    return PARALLEL_SCAN_WORKERS or os.cpu_count() or 1
+
+
+def should_scan(table_data):
+    """Стоит ли просматривать таблицу параллельно: она большая и ядер несколько."""
+    return len(table_data) >= PARALLEL_SCAN_THRESHOLD and worker_count() > 1
+
+
+def _chunk_columns(path, names, lo, hi):
+    """Читает из отображённого сегмента значения столбцов names в позициях lo..hi-1."""
+    table = binfmt.open_table(path)
+    columns = {}
+    for name in names:
+        column = table.data.get(name)
+        if column is None:
+            # Отсутствующий столбец ведёт себя как row.get() -> None.
+            columns[name] = [None] * (hi - lo)
+        elif table.types[name] == "str":
+            columns[name] = column.values(lo, hi)
+        else:
+            # bool хранится байтами 0/1; в сравнениях 1 == True, 0 == False.
+            columns[name] = column[lo:hi].tolist()
+    return columns
+
+
+def _compare(column, op, value, positions):
+    test = OPERATORS[op]
+    try:
+        return [i for i in positions if test(column[i], value)]
+    except TypeError:
+        # Как и compile_where, считаем сравнение несовместимых типов ложным.
+        result = []
+        for i in positions:
+            try:
+                if test(column[i], value):
+                    result.append(i)
+            except TypeError:
+                pass
+        return result
+
+
+def _filter(condition, columns, positions):
+    """Отбирает из positions позиции, подходящие под условие, по столбцам."""
+    kind = condition[0]
+    if kind == "and":
+        for child in condition[1]:
+            positions = _filter(child, columns, positions)
+        return positions
+    if kind == "or":
+        found = set()
+        for child in condition[1]:
+            found.update(_filter(child, columns, positions))
+        return sorted(found)
+    column = columns[condition[1]]
+    if kind == "in":
+        values = condition[2]
+        return [i for i in positions if column[i] in values]
+    return _compare(column, condition[2], condition[3], positions)
+
+
+def _scan_chunk(path, condition, lo, hi):
+    """
+    Выполняется в рабочем процессе: отображает сегмент в память
+    и возвращает позиции записей lo..hi-1, подходящих под условие.
+    """
+    columns = _chunk_columns(path, columns_of(condition), lo, hi)
+    return array("q", (lo + i for i in _filter(condition, columns, range(hi - lo))))
+
+
+def _column_type(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    return "str"
+
+
+def _write_segment(table_data, names):
+    """
+    Записывает нужные для условия столбцы таблицы во временный файл
+    двоичного формата, который рабочие процессы отображают в память
+    вместо того, чтобы получать записи через pickle.
+    """
+    if isinstance(table_data, ColumnTable):
+        columns = [(name, table_data.types[name]) for name in table_data.names]
+    else:
+        columns = [(name, _column_type(value)) for name, value in table_data[0].items()]
+    # ID нужен отображённой таблице, чтобы знать число записей.
+    columns = [
+        (name, col_type) for name, col_type in columns
+        if name in names or name == ID_COL
+    ]
+    import tempfile
+
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    fd, path = tempfile.mkstemp(
+        prefix="primitive_db_scan_", suffix=".bin", dir=directory
+    )
+    os.close(fd)
+    try:
+        binfmt.write_table(path, columns, table_data, fsync=False)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _acquire_segment(table_name, table_data, names, version):
+    """
+    Возвращает сегмент для просмотра и увеличивает его счётчик ссылок.
+    Сегмент таблицы с именем переиспользуется, пока не изменились версия
+    таблицы и набор столбцов; иначе столбцы записываются заново — после
+    каждого изменения таблицы первый параллельный просмотр платит
+    за запись сегмента.
+    """
+    key = (version, frozenset(names))
+    with _lock:
+        segment = _segments.get(table_name)
+        if table_name is not None and segment is not None and segment["key"] == key:
+            segment["refs"] += 1
+            return segment
+    segment = {"key": key, "path": _write_segment(table_data, names), "refs": 1}
+    if table_name is not None:
+        with _lock:
+            _retire(_segments.pop(table_name, None))
+            _segments[table_name] = segment
+    return segment
+
+
+def _retire(segment):
+    """Удаляет сегмент сразу или, если он ещё используется, после просмотров."""
+    if segment is None:
+        return
+    if segment["refs"]:
+        _retired.append(segment)
+    else:
+        _remove(segment["path"])
+
+
+def _release_segment(table_name, segment):
+    """Уменьшает счётчик ссылок сегмента и удаляет ненужный сегмент."""
+    with _lock:
+        segment["refs"] -= 1
+        if segment["refs"]:
+            return
+        if segment in _retired:
+            _retired.remove(segment)
+            _remove(segment["path"])
+        elif table_name is None:
+            _remove(segment["path"])
+
+
+def release(table_name=None):
+    """Удаляет сегмент таблицы table_name или, без имени, все сегменты."""
+    with _lock:
+        names = list(_segments) if table_name is None else [table_name]
+        for name in names:
+            _retire(_segments.pop(name, None))
+
+
+def _get_executor():
+    global _executor
+    # multiprocessing и concurrent.futures загружаются только при первом
+    # параллельном просмотре: обычному запуску они не нужны.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _lock:
+        if _executor is not None:
+            return _executor
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        _executor = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context(method),
+        )
+        return _executor
+
+
+def scan(table_name, table_data, condition, version=None):
+    """
+    Просматривает таблицу в пуле процессов: делит её на куски и проверяет
+    условие в каждом куске параллельно. Возвращает позиции подходящих
+    записей по возрастанию (то есть в порядке ID) или None, если
+    параллельный просмотр не удался (по любой причине) и нужно просмотреть
+    таблицу обычным образом.
+    """
+    global _executor
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        segment = _acquire_segment(
+            table_name, table_data, columns_of(condition), version
+        )
+    except Exception:
+        return None
+    size = len(table_data)
+    chunks = worker_count() * CHUNKS_PER_WORKER
+    step = -(-size // chunks)
+    try:
+        executor = _get_executor()
+        futures = [
+            executor.submit(
+                _scan_chunk, segment["path"], condition, lo, min(lo + step, size)
+            )
+            for lo in range(0, size, step)
+        ]
+        positions = []
+        for future in futures:
+            positions.extend(future.result())
+    except BrokenProcessPool:
+        with _lock:
+            if _executor is executor:
+                _executor = None
+        return None
+    except Exception:
+        return None
+    finally:
+        _release_segment(table_name, segment)
+    return positions
+
+
+def _shutdown():
+    release()
+    with _lock:
+        for segment in _retired:
+            _remove(segment["path"])
+        _retired.clear()
+
+
+atexit.register(_shutdown)
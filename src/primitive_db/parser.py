@@ -1,7 +1,15 @@
 # src/primitive_db/parser.py
 
+import re
 import shlex
 
+from src.primitive_db.query import OPERATORS
+
+_TOKEN_RE = re.compile(
+    r"""\s*(?:(?P<quoted>"[^"]*"|'[^']*')|(?P<op><=|>=|!=|=|<|>)"""
+    r"""|(?P<punct>[(),])|(?P<word>[^\s()<>=!,"']+))"""
+)
+
 
 def parse_condition(condition_str):
     """
@@ -17,23 +25,21 @@ def parse_condition(condition_str):
         print(f'Некорректное условие: {condition_str}')
         return {}
 
-    column = tokens[0]
-    value = tokens[2]
+    return {tokens[0]: parse_value(tokens[2])}
 
-    if value.lower() == "true":
-        value = True
-    elif value.lower() == "false":
-        value = False
-    else:
-        try:
-            if "." in value:
-                value = float(value)
-            else:
-                value = int(value)
-        except ValueError:
-            pass
 
-    return {column: value}
+def parse_value(value):
+    """Преобразует строковое значение в bool, int, float или оставляет строкой."""
+    if value.lower() == "true":
+        return True
+    if value.lower() == "false":
+        return False
+    try:
+        if "." in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
 
 
 def parse_set_clause(set_str):
@@ -49,4 +55,247 @@ def parse_set_clause(set_str):
         if not condition:
             return {}
         result.update(condition)
-    return result
\ No newline at end of file
+    return result
+
+def _clean_value(chars):
+    return "".join(chars).strip().strip('"').strip("'")
+
+
+def parse_values_list(values_str):
+    """
+    Разбирает группы значений для insert: '(v1, v2), (v3, v4)'.
+    Запятые и скобки внутри кавычек считаются частью значения.
+    Возвращает список строк (каждая — список значений) или None
+    при некорректном формате.
+    """
+    rows = []
+    row = None
+    current = []
+    quote = None
+    for char in values_str:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif row is None:
+            if char == "(":
+                row = []
+            elif char != "," and not char.isspace():
+                break
+        elif char in "\"'":
+            quote = char
+            current.append(char)
+        elif char == "(":
+            break
+        elif char in ",)":
+            row.append(_clean_value(current))
+            current = []
+            if char == ")":
+                rows.append(row)
+                row = None
+        else:
+            current.append(char)
+    else:
+        if row is None and rows:
+            return rows
+    print(f"Некорректный список значений: {values_str}")
+    return None
+
+
+def _tokenize(condition_str):
+    tokens = []
+    pos = 0
+    condition_str = condition_str.rstrip()
+    while pos < len(condition_str):
+        match = _TOKEN_RE.match(condition_str, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(condition_str[pos:])
+        pos = match.end()
+        if match.group("quoted"):
+            tokens.append(("value", match.group("quoted")[1:-1]))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op")))
+        elif match.group("punct"):
+            tokens.append((match.group("punct"), match.group("punct")))
+        else:
+            word = match.group("word")
+            if word.lower() in ("and", "or", "in"):
+                tokens.append((word.lower(), word))
+            else:
+                tokens.append(("word", word))
+    return tokens
+
+
+class _WhereParser:
+    """Разбор условия методом рекурсивного спуска."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][0]
+        return None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            found = self.tokens[self.pos][1] if self.peek() else "конец строки"
+            raise ValueError(found)
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def value(self):
+        if self.peek() == "value":
+            return self.take("value")
+        return parse_value(self.take("word"))
+
+    def expr(self):
+        parts = [self.term()]
+        while self.peek() == "or":
+            self.take("or")
+            parts.append(self.term())
+        return parts[0] if len(parts) == 1 else ("or", tuple(parts))
+
+    def term(self):
+        parts = [self.factor()]
+        while self.peek() == "and":
+            self.take("and")
+            parts.append(self.factor())
+        return parts[0] if len(parts) == 1 else ("and", tuple(parts))
+
+    def factor(self):
+        if self.peek() == "(":
+            self.take("(")
+            node = self.expr()
+            self.take(")")
+            return node
+        column = self.take("word")
+        if self.peek() == "in":
+            self.take("in")
+            self.take("(")
+            values = [self.value()]
+            while self.peek() == ",":
+                self.take(",")
+                values.append(self.value())
+            self.take(")")
+            return ("in", column, tuple(values))
+        op = self.take("op")
+        if op not in OPERATORS:
+            raise ValueError(op)
+        return ("cmp", column, op, self.value())
+
+
+def parse_where(condition_str):
+    """
+    Разбирает условие where в дерево условий.
+    Поддерживает операторы =, !=, <, <=, >, >=, IN (...),
+    связки AND и OR и скобки. Значения в кавычках остаются строками.
+    Возвращает None при некорректном формате.
+    """
+    try:
+        parser = _WhereParser(_tokenize(condition_str))
+        condition = parser.expr()
+        if parser.peek() is not None:
+            raise ValueError(parser.tokens[parser.pos][1])
+    except ValueError:
+        print(f'Некорректное условие: {condition_str}')
+        return None
+    return condition
+
+
+_SELECT_RE = re.compile(
+    r"^select\s+(?:(?P<columns>.*?)\s+)?from\s+(?P<table>\S+)"
+    r"(?:\s+join\s+(?P<join>\S+)\s+on\s+(?P<on_left>[^\s=]+)\s*=\s*(?P<on_right>[^\s=]+))?"
+    r"(?:\s+where\s+(?P<where>.*?))?"
+    r"(?:\s+group\s+by\s+(?P<group>[^\s,]+(?:\s*,\s*[^\s,]+)*))?"
+    r"(?P<tail>(?:\s+(?:limit|offset)\s+\d+)*)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAIL_RE = re.compile(r"(limit|offset)\s+(\d+)", re.IGNORECASE)
+_AGGREGATE_RE = re.compile(
+    r"^(count|sum|min|max|avg)\s*\(\s*([^\s()]+)\s*\)$", re.IGNORECASE
+)
+
+
+def parse_select(select_str):
+    """
+    Разбирает команду select [<столбцы>|*] from <таблица>
+    [join <таблица2> on <столбец1> = <столбец2>] [where <условие>]
+    [group by <столбцы>] [limit N] [offset M]. Среди столбцов допустимы
+    агрегаты count(*), count(col), sum(col), min(col), max(col), avg(col).
+    Возвращает словарь с ключами table, join (None или словарь с ключами
+    table и on — пара столбцов), columns (имена столбцов вывода или None —
+    все столбцы), aggregates (список пар (функция, столбец)), group_by
+    (список столбцов), where (дерево условия или None), limit (число
+    или None) и offset. При ошибке возвращает None.
+    """
+    match = _SELECT_RE.match(select_str.strip())
+    if match is None:
+        print(
+            "Некорректная команда select. Формат: select [<столбцы>|*] "
+            "from <table> [join <table2> on <col1> = <col2>] "
+            "[where <condition>] [group by <столбцы>] "
+            "[limit N] [offset M]"
+        )
+        return None
+
+    columns = None
+    aggregates = []
+    columns_str = (match.group("columns") or "").strip()
+    if columns_str and columns_str != "*":
+        columns = []
+        for item in columns_str.split(","):
+            item = item.strip()
+            aggregate = _AGGREGATE_RE.match(item)
+            if aggregate:
+                func, column = aggregate.group(1).lower(), aggregate.group(2)
+                aggregates.append((func, column))
+                item = f"{func}({column})"
+            columns.append(item)
+        if not all(columns) or len(set(columns)) != len(columns):
+            print(f"Некорректный список столбцов: {columns_str}")
+            return None
+
+    group_by = []
+    if match.group("group"):
+        group_by = [name.strip() for name in match.group("group").split(",")]
+    if aggregates or group_by:
+        if columns is None:
+            print("Вместе с group by и агрегатами столбцы нужно перечислить явно.")
+            return None
+        plain = [name for name in columns if not _AGGREGATE_RE.match(name)]
+        for name in plain:
+            if name not in group_by:
+                print(f"Столбец {name} должен входить в group by.")
+                return None
+
+    join = None
+    if match.group("join"):
+        if aggregates or group_by:
+            print("Агрегаты и group by для соединения таблиц не поддерживаются.")
+            return None
+        join = {
+            "table": match.group("join"),
+            "on": (match.group("on_left"), match.group("on_right")),
+        }
+
+    where = None
+    if match.group("where") is not None:
+        where = parse_where(match.group("where"))
+        if where is None:
+            return None
+
+    options = {"limit": None, "offset": 0}
+    for key, value in _TAIL_RE.findall(match.group("tail")):
+        options[key.lower()] = int(value)
+    return {
+        "table": match.group("table"),
+        "join": join,
+        "columns": columns,
+        "aggregates": aggregates,
+        "group_by": group_by,
+        "where": where,
+        **options,
+    }
@@ -0,0 +1,39 @@
+# src/primitive_db/protocol.py
+
+from src.primitive_db.constants import SERVER_ADDRESS
+
+# Запрос — одна команда в кодировке UTF-8, завершённая переводом строки.
+# Ответ — длина текста в байтах отдельной строкой, затем сам текст:
+# всё, что команда вывела бы в консоль. Клиент может отправить несколько
+# запросов подряд, не дожидаясь ответов: они приходят в том же порядке.
+ENCODING = "utf-8"
+
+
+def parse_address(address=SERVER_ADDRESS):
+    """
+    Разбирает адрес сервера: tcp://хост:порт или unix:///путь/к/сокету.
+    Возвращает ("tcp", (хост, порт)) или ("unix", путь).
+    """
+    scheme, sep, rest = address.partition("://")
+    if not sep:
+        raise ValueError(f"Некорректный адрес: {address}")
+    if scheme == "unix" and rest:
+        return "unix", rest
+    if scheme == "tcp":
+        host, _, port = rest.rpartition(":")
+        if host and port.isdigit():
+            return "tcp", (host.strip("[]"), int(port))
+    raise ValueError(f"Некорректный адрес: {address}")
+
+
+def encode_request(command):
+    """Кодирует команду в запрос; команда должна занимать одну строку."""
+    if "\n" in command or "\r" in command:
+        raise ValueError("Команда не может содержать перевод строки.")
+    return (command + "\n").encode(ENCODING)
+
+
+def encode_response(text):
+    """Кодирует вывод команды в ответ с длиной в заголовке."""
+    payload = text.encode(ENCODING)
+    return f"{len(payload)}\n".encode(ENCODING) + payload
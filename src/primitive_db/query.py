@@ -0,0 +1,123 @@
+# src/primitive_db/query.py
+
+import operator
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+RANGE_OPERATORS = {"=", "<", "<=", ">", ">="}
+
+
+def as_condition(where_clause):
+    """
+    Приводит условие where к дереву условий.
+    Словарь {столбец: значение} превращается в AND из равенств;
+    дерево, построенное parse_where, возвращается без изменений.
+    Узлы дерева: ("cmp", столбец, оператор, значение),
+    ("in", столбец, (значения,...)), ("and", (...)), ("or", (...)).
+    """
+    if not where_clause:
+        return None
+    if isinstance(where_clause, dict):
+        items = sorted(where_clause.items(), key=lambda item: item[0])
+        if len(items) == 1:
+            column, value = items[0]
+            return ("cmp", column, "=", value)
+        return ("and", tuple(("cmp", column, "=", value) for column, value in items))
+    return where_clause
+
+
+def compile_where(condition):
+    """
+    Компилирует дерево условий в функцию predicate(row) -> bool.
+    Сравнение значений несовместимых типов считается ложным.
+    """
+    if condition is None:
+        return lambda row: True
+    kind = condition[0]
+    if kind == "cmp":
+        _, column, op, value = condition
+        if op == "=":
+            return lambda row: row.get(column) == value
+        if op == "!=":
+            return lambda row: row.get(column) != value
+        compare = OPERATORS[op]
+
+        def predicate(row):
+            try:
+                return compare(row.get(column), value)
+            except TypeError:
+                return False
+        return predicate
+    if kind == "in":
+        _, column, values = condition
+        return lambda row: row.get(column) in values
+    parts = [compile_where(child) for child in condition[1]]
+    if kind == "and":
+        return lambda row: all(part(row) for part in parts)
+    return lambda row: any(part(row) for part in parts)
+
+
+def conjuncts(condition):
+    """Возвращает условия, объединённые через AND на верхнем уровне."""
+    if condition is None:
+        return []
+    if condition[0] == "and":
+        result = []
+        for child in condition[1]:
+            result.extend(conjuncts(child))
+        return result
+    return [condition]
+
+
+def comparisons(condition):
+    """Возвращает сравнения верхнего уровня как список (столбец, оператор, значение)."""
+    return [
+        (part[1], part[2], part[3])
+        for part in conjuncts(condition)
+        if part[0] == "cmp"
+    ]
+
+
+def equalities(condition):
+    """Возвращает равенства верхнего уровня как словарь {столбец: значение}."""
+    return {column: value for column, op, value in comparisons(condition) if op == "="}
+
+
+def columns_of(condition):
+    """Возвращает множество столбцов, упомянутых в дереве условий."""
+    if condition is None:
+        return set()
+    if condition[0] in ("cmp", "in"):
+        return {condition[1]}
+    result = set()
+    for child in condition[1]:
+        result |= columns_of(child)
+    return result
+
+
+def combine(parts):
+    """Объединяет условия через AND; для пустого списка возвращает None."""
+    parts = list(parts)
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return ("and", tuple(parts))
+
+
+def rename_columns(condition, rename):
+    """Возвращает копию дерева условий с именами столбцов, заменёнными rename."""
+    if condition is None:
+        return None
+    kind = condition[0]
+    if kind == "cmp":
+        return ("cmp", rename(condition[1]), condition[2], condition[3])
+    if kind == "in":
+        return ("in", rename(condition[1]), condition[2])
+    return (kind, tuple(rename_columns(child, rename) for child in condition[1]))
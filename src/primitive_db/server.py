@@ -0,0 +1,249 @@
+# src/primitive_db/server.py
+
+import asyncio
+import io
+import os
+import shlex
+import signal
+import sys
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from src.primitive_db.constants import (
+    FLUSH_POLICY,
+    SERVER_ADDRESS,
+    SERVER_LINE_LIMIT,
+)
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import execute
+from src.primitive_db.protocol import ENCODING, encode_response, parse_address
+from src.primitive_db.store import TableStore
+
+# Команды, которые не меняют данные и могут выполняться параллельно.
+READ_COMMANDS = {"select", "info", "list_tables", "export", "stats", "cache", "help"}
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Подменяет sys.stdout на время работы сервера: вывод потока,
+    выполняющего команду клиента, собирается в его собственный буфер,
+    остальной вывод идёт в настоящий stdout.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.default).write(text)
+
+    def flush(self):
+        self.default.flush()
+
+    def capture(self, func, *args):
+        """Вызывает func и возвращает всё, что она вывела."""
+        self.local.buffer = io.StringIO()
+        try:
+            func(*args)
+            return self.local.buffer.getvalue()
+        finally:
+            self.local.buffer = None
+
+
+class _ReadWriteLock:
+    """
+    Блокировка для asyncio: читателей может быть несколько одновременно,
+    писатель работает один. Ожидающий писатель не пропускает новых
+    читателей вперёд себя.
+    """
+
+    def __init__(self):
+        self.condition = asyncio.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self):
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: not self.writer and not self.waiting_writers
+            )
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.readers -= 1
+                self.condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self.condition:
+            self.waiting_writers += 1
+            try:
+                await self.condition.wait_for(
+                    lambda: not self.writer and not self.readers
+                )
+            finally:
+                self.waiting_writers -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+
+def _command_name(line):
+    try:
+        args = shlex.split(line)
+    except ValueError:
+        return ""
+    return args[0].lower() if args else ""
+
+
+async def _read_command(reader):
+    """
+    Читает из соединения одну строку запроса. Возвращает b"", если
+    соединение закрыто, и None, если строка длиннее SERVER_LINE_LIMIT:
+    такая строка пропускается до перевода строки целиком.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+    while True:
+        try:
+            await reader.readexactly(consumed)
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return b""
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+
+
+class Server:
+    """
+    Сервер базы данных: держит таблицы в памяти одного процесса и выполняет
+    команды клиентов в той же грамматике, что и консольный интерфейс.
+    Читающие команды выполняются параллельно в потоках, изменяющие —
+    по одной. Команды одного соединения выполняются по порядку,
+    поэтому клиент может отправлять их конвейером.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = _ReadWriteLock()
+        self.output = _ThreadOutput(sys.stdout)
+
+    def _execute(self, line):
+        try:
+            execute(self.store, line)
+        except Exception as e:
+            print(f"Произошла непредвиденная ошибка: {e}")
+
+    async def run_command(self, line):
+        """Выполняет одну команду и возвращает её вывод."""
+        if _command_name(line) in READ_COMMANDS:
+            guard = self.lock.read()
+        else:
+            guard = self.lock.write()
+        async with guard:
+            return await asyncio.to_thread(self.output.capture, self._execute, line)
+
+    async def handle(self, reader, writer):
+        """
+        Обслуживает одно соединение до команды exit или его закрытия.
+        Соединение, начавшее транзакцию (begin), держит блокировку записи
+        до commit или rollback, поэтому другие клиенты не видят
+        незафиксированных изменений. Если соединение закрывается посреди
+        транзакции, она отменяется.
+        """
+        transaction = None
+        try:
+            while (line := await _read_command(reader)) != b"":
+                if line is None:
+                    writer.write(encode_response(
+                        f"Ошибка: команда длиннее {SERVER_LINE_LIMIT} байт.\n"
+                    ))
+                    await writer.drain()
+                    continue
+                line = line.decode(ENCODING).strip()
+                name = _command_name(line)
+                if name == "exit":
+                    break
+                if transaction is None and name == "begin":
+                    transaction = AsyncExitStack()
+                    await transaction.enter_async_context(self.lock.write())
+                if transaction is None:
+                    output = await self.run_command(line)
+                else:
+                    output = await asyncio.to_thread(
+                        self.output.capture, self._execute, line
+                    )
+                    if not self.store.in_transaction:
+                        await transaction.aclose()
+                        transaction = None
+                writer.write(encode_response(output))
+                await writer.drain()
+        except (ConnectionError, UnicodeDecodeError, ValueError):
+            pass
+        finally:
+            if transaction is not None:
+                if self.store.in_transaction:
+                    await asyncio.to_thread(self.store.rollback)
+                await transaction.aclose()
+            writer.close()
+
+    async def serve(self, address):
+        kind, target = parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(
+                self.handle, path=target, limit=SERVER_LINE_LIMIT
+            )
+        else:
+            server = await asyncio.start_server(
+                self.handle, *target, limit=SERVER_LINE_LIMIT
+            )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except NotImplementedError:  # Windows: остаётся KeyboardInterrupt
+                pass
+        print(f"Сервер базы данных слушает {address}. Остановка — Ctrl+C.")
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+            if kind == "unix" and os.path.exists(target):
+                os.remove(target)
+
+
+def serve(address=SERVER_ADDRESS, flush_policy=FLUSH_POLICY):
+    """
+    Запускает сервер по адресу tcp://хост:порт или unix:///путь.
+    Удаление записей и таблиц подтверждается автоматически: у клиентов
+    нет консоли для ответа. Изменения сбрасываются на диск согласно
+    flush_policy и при остановке сервера.
+    """
+    store = TableStore(flush_policy)
+    set_auto_confirm(True)
+    server = Server(store)
+    sys.stdout = server.output
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout = server.output.default
+        set_auto_confirm(None)
+        store.close()
+        print("Сервер остановлен.")
@@ -0,0 +1,476 @@
+# src/primitive_db/store.py
+
+import os
+import threading
+import time
+
+from src.primitive_db import binfmt, core
+from src.primitive_db.columnar import to_layout
+from src.primitive_db.constants import (
+    FLUSH_POLICY,
+    ID_COL,
+    META_FILE,
+    WRITER_LOCK_FILE,
+)
+from src.primitive_db.locks import DatabaseLockedError, FileLock
+from src.primitive_db.utils import (
+    append_table_log,
+    compact_if_needed,
+    compact_table,
+    load_commit,
+    load_metadata,
+    load_table_data,
+    log_path,
+    remove_commit,
+    remove_snapshot,
+    remove_table_data,
+    save_commit,
+    save_metadata,
+    table_format,
+    table_path,
+    truncate_table_log,
+)
+
+
+class TableLoadError(RuntimeError):
+    """Файлы таблицы не удалось прочитать: они повреждены или недоступны."""
+
+
+def parse_flush_policy(policy):
+    """
+    Разбирает политику сброса изменений на диск.
+    Поддерживаются: 'command' — после каждой команды, 'exit' — при выходе,
+    'ops:N' — каждые N изменений, 'interval:S' — на первой команде после
+    того, как с прошлого сброса прошло S секунд, с fsync журнала (отдельного
+    таймера нет: без новых команд изменения ждут выхода).
+    Возвращает пару (режим, параметр).
+    """
+    mode, _, arg = policy.partition(":")
+    mode = mode.strip().lower()
+    if mode in ("command", "exit") and not arg:
+        return mode, None
+    if mode == "ops":
+        count = int(arg)
+        if count < 1:
+            raise ValueError(f"Некорректная политика сброса: {policy}")
+        return mode, count
+    if mode == "interval":
+        seconds = float(arg)
+        if seconds <= 0:
+            raise ValueError(f"Некорректная политика сброса: {policy}")
+        return mode, seconds
+    raise ValueError(f"Некорректная политика сброса: {policy}")
+
+
+def apply_commit(record):
+    """
+    Применяет запись о фиксации транзакции: удаляет файлы удалённых таблиц,
+    обрезает журналы таблиц до длины на момент фиксации и дописывает
+    в них изменения транзакции, затем сохраняет метаданные. Повторное
+    применение той же записи даёт тот же результат, поэтому после сбоя
+    её можно применить заново.
+    """
+    for table_name in record["dropped"]:
+        remove_table_data(table_name)
+    for table_name, entry in record["tables"].items():
+        truncate_table_log(table_name, entry["log_size"])
+        append_table_log(table_name, entry["records"], fsync=True)
+    if record["metadata"] is not None:
+        save_metadata(record["metadata"])
+
+
+def _file_state(path):
+    """Возвращает признаки версии файла: время изменения, размер, inode."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class TableStore:
+    """
+    Хранит метаданные и данные таблиц в памяти в течение сессии.
+    Изменения, о которых сообщают функции core, копятся в памяти
+    и сбрасываются на диск согласно политике сброса.
+    Писать в базу может только одна сессия: она держит исключительную
+    блокировку WRITER_LOCK_FILE. Сессий только для чтения (read_only=True)
+    может быть сколько угодно; они перечитывают таблицы, которые
+    изменил писатель.
+    """
+
+    def __init__(self, flush_policy=FLUSH_POLICY, read_only=False):
+        self.mode, self.limit = parse_flush_policy(flush_policy)
+        self.read_only = read_only
+        self.writer_lock = None
+        if not read_only:
+            self.writer_lock = FileLock(WRITER_LOCK_FILE)
+            if not self.writer_lock.acquire(blocking=False):
+                self.writer_lock = None
+                raise DatabaseLockedError(
+                    "База данных уже открыта на запись другим процессом."
+                )
+        # Сервер выполняет читающие команды в нескольких потоках:
+        # загрузка таблиц и сброс изменений выполняются по одному.
+        self.lock = threading.RLock()
+        if not read_only:
+            # Транзакция, зафиксированная до сбоя, но не дописанная в файлы
+            # таблиц, доводится до конца.
+            record = load_commit()
+            if record is not None:
+                apply_commit(record)
+                remove_commit()
+        self.in_transaction = False
+        self.meta_state = _file_state(META_FILE)
+        self.table_states = {}
+        self.metadata = load_metadata()
+        self.tables = {}
+        self.pending = {}
+        self.dropped = set()
+        self.metadata_dirty = False
+        self.ops = 0
+        self.last_flush = time.monotonic()
+        # Индексы, версии таблиц, кэш и журнал core у каждой сессии свои:
+        # функции core работают с ними внутри core.use_state(self.state).
+        self.state = core.SessionState(self.record)
+
+    def get_table(self, table_name):
+        """
+        Возвращает данные таблицы, загружая их с диска только один раз.
+        При загрузке переводит таблицу в представление из метаданных,
+        строит отображение ID -> запись и индексы и сверяет
+        последовательность ID с данными.
+        Для таблицы, которой нет в метаданных, возвращает пустой список,
+        не трогая диск и не запоминая его.
+        """
+        if table_name in self.tables:
+            return self.tables[table_name]
+        if table_name not in self.metadata:
+            return []
+        with self.lock:
+            if table_name in self.tables:
+                return self.tables[table_name]
+            if self.read_only:
+                self.table_states[table_name] = self._table_state(table_name)
+            if table_name in self.dropped:
+                # Файлы удалённой таблицы ещё не стёрты с диска: новая
+                # таблица с тем же именем начинается пустой.
+                table_data = []
+            else:
+                try:
+                    table_data = load_table_data(
+                        table_name, self.metadata.get(table_name),
+                        repair=not self.read_only,
+                    )
+                except Exception as e:
+                    raise TableLoadError(
+                        f'Не удалось загрузить таблицу "{table_name}": {e}'
+                    ) from e
+            if table_name in self.metadata:
+                table_meta = self.metadata[table_name]
+                table_data = to_layout(
+                    table_data,
+                    table_meta["columns"],
+                    table_meta.get("layout", "rows"),
+                    table_meta.get("dict_columns", ()),
+                )
+                if table_data:
+                    last_id = table_data[-1][ID_COL]
+                    if core.next_id(table_meta, table_data) <= last_id:
+                        table_meta["next_id"] = last_id + 1
+                        self.metadata_dirty = True
+                if table_meta.get("rows") != len(table_data) and not self.read_only:
+                    # Счётчик мог отстать, если процесс упал между записью
+                    # журнала и метаданных.
+                    table_meta["rows"] = len(table_data)
+                    self.metadata_dirty = True
+            self._attach(table_name, table_data)
+        return self.tables[table_name]
+
+    def _snapshot_only(self, table_name):
+        """
+        Возвращает путь к двоичному снимку таблицы, если он есть и таблицу
+        можно читать прямо из него: она не загружена в память и у неё
+        нет журнала изменений.
+        """
+        table_meta = self.metadata.get(table_name)
+        if table_name in self.tables or table_name in self.dropped:
+            return None
+        if table_format(table_meta) != "binary":
+            return None
+        path = table_path(table_name, "binary")
+        if os.path.exists(log_path(table_name)) or not os.path.exists(path):
+            return None
+        return path
+
+    def peek_table(self, table_name):
+        """
+        Возвращает данные таблицы только для чтения.
+        Двоичный снимок открывается через mmap без загрузки таблицы в память.
+        """
+        path = self._snapshot_only(table_name)
+        if path is not None:
+            if self.read_only:
+                self.table_states[table_name] = self._table_state(table_name)
+            try:
+                return binfmt.open_table(path)
+            except Exception as e:
+                raise TableLoadError(
+                    f'Не удалось открыть таблицу "{table_name}": {e}'
+                ) from e
+        return self.get_table(table_name)
+
+    def row_count(self, table_name):
+        """
+        Возвращает число записей, не загружая таблицу, если это возможно:
+        из резидентной таблицы, из счётчика rows в метаданных, который
+        обновляется при каждом сбросе, или из заголовка двоичного снимка.
+        """
+        if table_name in self.tables:
+            return len(self.tables[table_name])
+        rows = self.metadata.get(table_name, {}).get("rows")
+        if rows is not None:
+            return rows
+        path = self._snapshot_only(table_name)
+        if path is not None:
+            return binfmt.read_header(path)["rows"]
+        return len(self.get_table(table_name))
+
+    def _table_state(self, table_name):
+        fmt = table_format(self.metadata.get(table_name))
+        return (
+            _file_state(table_path(table_name, fmt)),
+            _file_state(log_path(table_name)),
+        )
+
+    def _forget(self, table_name):
+        self.tables.pop(table_name, None)
+        self.table_states.pop(table_name, None)
+        with core.use_state(self.state):
+            core.invalidate_table(table_name)
+            core.drop_indexes(table_name)
+
+    def refresh(self):
+        """
+        Для сессии только для чтения: забывает таблицы, файлы которых
+        изменил другой процесс, и перечитывает изменённые метаданные.
+        Забытые таблицы загрузятся заново при следующем обращении.
+        """
+        if not self.read_only:
+            return
+        meta_state = _file_state(META_FILE)
+        if meta_state != self.meta_state:
+            self.meta_state = meta_state
+            self.metadata = load_metadata()
+            for table_name in list(self.table_states):
+                self._forget(table_name)
+            return
+        for table_name, state in list(self.table_states.items()):
+            if self._table_state(table_name) != state:
+                self._forget(table_name)
+
+    def rewrite_snapshot(self, table_name, old_format):
+        """
+        Записывает снимок таблицы в формате из метаданных, удаляет журнал
+        и снимок в старом формате old_format.
+        """
+        table_data = self.get_table(table_name)
+        self.flush()
+        compact_table(table_name, table_data, self.metadata[table_name])
+        if table_format(self.metadata[table_name]) != old_format:
+            remove_snapshot(table_name, old_format)
+        save_metadata(self.metadata)
+        self.metadata_dirty = False
+
+    def _attach(self, table_name, table_data):
+        """Делает таблицу резидентной и строит для неё индексы."""
+        with core.use_state(self.state):
+            core.drop_indexes(table_name)
+            core.build_id_map(table_name, table_data)
+            if table_name in self.metadata:
+                table_meta = self.metadata[table_name]
+                for column in table_meta["indexes"]:
+                    core.build_index(table_name, table_data, column)
+                for column in table_meta.get("sorted_indexes", []):
+                    core.build_sorted_index(table_name, table_data, column)
+        self.tables[table_name] = table_data
+
+    def replace_table(self, table_name, table_data):
+        """Заменяет резидентную таблицу, например другим представлением."""
+        with core.use_state(self.state):
+            core.invalidate_table(table_name)
+        self._attach(table_name, table_data)
+
+    def set_table(self, table_name, table_data):
+        """Заменяет данные таблицы, например после delete."""
+        self.tables[table_name] = table_data
+
+    def record(self, table_name, records):
+        """Запоминает изменения таблицы до следующего сброса на диск."""
+        self.pending.setdefault(table_name, []).extend(records)
+        # Пакет вставки — одна запись журнала, но считается по числу записей.
+        self.ops += sum(len(record.get("rows", (None,))) for record in records)
+
+    def mark_metadata_dirty(self):
+        """Отмечает, что метаданные нужно сохранить при следующем сбросе."""
+        self.metadata_dirty = True
+
+    def drop_table(self, table_name):
+        """Забывает данные удалённой таблицы; файлы удаляются при сбросе."""
+        self.tables.pop(table_name, None)
+        self.pending.pop(table_name, None)
+        with core.use_state(self.state):
+            core.invalidate_table(table_name)
+            core.drop_indexes(table_name)
+        self.dropped.add(table_name)
+        self.metadata_dirty = True
+
+    @property
+    def dirty(self):
+        """Есть ли изменения, ещё не записанные на диск."""
+        return bool(self.pending or self.dropped or self.metadata_dirty)
+
+    def after_command(self):
+        """
+        Сбрасывает изменения на диск, если этого требует политика.
+        Срок 'interval' проверяется только здесь, то есть после команды.
+        """
+        if not self.dirty or self.in_transaction:
+            return
+        if self.mode == "command":
+            self.flush()
+        elif self.mode == "ops" and self.ops >= self.limit:
+            self.flush()
+        elif (
+            self.mode == "interval"
+            and time.monotonic() - self.last_flush >= self.limit
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Записывает все накопленные изменения на диск.
+        Внутри транзакции ничего не делает: изменения записывает commit.
+        """
+        with self.lock:
+            if not self.in_transaction:
+                self._flush()
+
+    def begin(self):
+        """
+        Начинает транзакцию: записывает на диск изменения, сделанные до неё,
+        и до commit или rollback копит все изменения в памяти.
+        """
+        with self.lock:
+            if self.read_only:
+                raise ValueError("Сессия открыта только для чтения.")
+            if self.in_transaction:
+                raise ValueError("Транзакция уже начата.")
+            self._flush()
+            self.in_transaction = True
+
+    def commit(self):
+        """
+        Фиксирует транзакцию. Все изменения сначала записываются одной
+        записью COMMIT_FILE с fsync и только потом переносятся в журналы
+        таблиц и метаданные, поэтому после сбоя транзакция либо
+        применяется целиком при следующем запуске, либо не применяется вовсе.
+        """
+        with self.lock:
+            if not self.in_transaction:
+                raise ValueError("Транзакция не начата.")
+            for table_name in self.pending:
+                if table_name in self.tables:
+                    self._count_rows(table_name)
+            record = {
+                "dropped": sorted(self.dropped),
+                "tables": {},
+                "metadata": self.metadata if self.metadata_dirty else None,
+            }
+            for table_name, records in self.pending.items():
+                state = _file_state(log_path(table_name))
+                base = 0 if table_name in self.dropped or state is None else state[1]
+                record["tables"][table_name] = {"log_size": base, "records": records}
+            if self.dirty:
+                save_commit(record)
+                apply_commit(record)
+                remove_commit()
+            self.pending.clear()
+            self.dropped.clear()
+            self.metadata_dirty = False
+            self.in_transaction = False
+            self.ops = 0
+            self.last_flush = time.monotonic()
+            # Журналы могли вырасти: сворачиваем их уже после фиксации.
+            for table_name in record["tables"]:
+                if table_name in self.tables:
+                    compact_if_needed(
+                        table_name, self.tables[table_name],
+                        self.metadata.get(table_name),
+                    )
+
+    def rollback(self):
+        """
+        Отменяет транзакцию: забывает накопленные изменения, перечитывает
+        метаданные и выгружает таблицы — они загрузятся с диска
+        в состоянии на момент begin.
+        """
+        with self.lock:
+            if not self.in_transaction:
+                raise ValueError("Транзакция не начата.")
+            self.pending.clear()
+            self.dropped.clear()
+            self.metadata = load_metadata()
+            self.metadata_dirty = False
+            self.ops = 0
+            for table_name in list(self.tables):
+                self._forget(table_name)
+            self.in_transaction = False
+
+    def _flush(self):
+        if self.read_only:
+            # Сессия только для чтения ничего не пишет: метаданные могли
+            # измениться лишь при сверке последовательности ID.
+            self.metadata_dirty = False
+            return
+        for table_name in self.dropped:
+            remove_table_data(table_name)
+        self.dropped.clear()
+
+        fsync = self.mode == "interval"
+        for table_name, records in self.pending.items():
+            append_table_log(table_name, records, fsync=fsync)
+            if table_name in self.tables:
+                compact_if_needed(
+                    table_name, self.tables[table_name], self.metadata.get(table_name)
+                )
+                self._count_rows(table_name)
+        self.pending.clear()
+
+        if self.metadata_dirty:
+            save_metadata(self.metadata)
+            self.metadata_dirty = False
+        self.ops = 0
+        self.last_flush = time.monotonic()
+
+    def _count_rows(self, table_name):
+        """Обновляет счётчик записей таблицы в метаданных, если он изменился."""
+        table_meta = self.metadata.get(table_name)
+        rows = len(self.tables[table_name])
+        if table_meta is not None and table_meta.get("rows") != rows:
+            table_meta["rows"] = rows
+            self.metadata_dirty = True
+
+    def close(self):
+        """
+        Сбрасывает изменения и снимает блокировку писателя.
+        Незавершённая транзакция отменяется.
+        """
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.flush()
+        finally:
+            if self.writer_lock is not None:
+                self.writer_lock.release()
+                self.writer_lock = None
@@ -1,48 +1,526 @@
 # src/primitive_db/utils.py
 
+import csv
 import json
 import os
+from contextlib import contextmanager
+from itertools import islice
 
-from src.primitive_db.constants import DATA_DIR, META_FILE
+from src.primitive_db import binfmt, metrics
+from src.primitive_db.columnar import ColumnTable, apply_alter
+from src.primitive_db.constants import (
+    COMMIT_FILE,
+    DATA_DIR,
+    ID_COL,
+    LOG_COMPACT_SIZE,
+    LOG_SUFFIX,
+    META_FILE,
+    TABLE_FORMATS,
+)
+from src.primitive_db.decorators import log_time
+from src.primitive_db.locks import locked, meta_lock_path, table_lock_path
 
 
+def _file_size(path):
+    """Возвращает размер файла в байтах или 0, если файла нет."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+@contextmanager
+def atomic_write(path, mode="w", newline=None):
+    """
+    Открывает временный файл рядом с path и после успешной записи
+    подменяет им path одним переименованием. При сбое во время записи
+    старый файл остаётся целым, а временный удаляется.
+    """
+    tmp_path = f"{path}.tmp"
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@log_time
 def load_metadata():
     """
     Загружает метаданные таблиц из META_FILE.
+    Описание таблицы в старом формате (список столбцов) приводится
+    к словарю {"columns": [...], "indexes": [...]}.
     Возвращает словарь, пустой если файл не найден.
     """
     os.makedirs(DATA_DIR, exist_ok=True)
     try:
-        with open(META_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with locked(meta_lock_path(), shared=True):
+            with open(META_FILE, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
     except FileNotFoundError:
         return {}
+    if metrics.ENABLED:
+        metrics.add("load_metadata", bytes_read=_file_size(META_FILE))
+    for table_name, table_meta in metadata.items():
+        if isinstance(table_meta, list):
+            metadata[table_name] = {"columns": table_meta, "indexes": []}
+    return metadata
 
 
+@log_time
 def save_metadata(data):
-    """Сохраняет метаданные таблиц в META_FILE."""
+    """Атомарно сохраняет метаданные таблиц в META_FILE под блокировкой."""
     os.makedirs(DATA_DIR, exist_ok=True)
-    with open(META_FILE, "w", encoding="utf-8") as f:
+    with locked(meta_lock_path()), atomic_write(META_FILE) as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+    if metrics.ENABLED:
+        metrics.add("save_metadata", bytes_written=_file_size(META_FILE))
+
+
+def table_format(table_meta):
+    """Возвращает формат файла-снимка таблицы: json или binary."""
+    if not table_meta:
+        return "json"
+    return table_meta.get("format", "json")
+
+
+def table_path(table_name, fmt="json"):
+    """Возвращает путь к файлу-снимку таблицы table_name в формате fmt."""
+    return os.path.join(DATA_DIR, f"{table_name}{TABLE_FORMATS[fmt]}")
+
+
+def log_path(table_name):
+    """Возвращает путь к журналу изменений таблицы table_name."""
+    return os.path.join(DATA_DIR, f"{table_name}{LOG_SUFFIX}")
+
+
+def replay_log(data, records):
+    """
+    Применяет записи журнала к данным снимка по порядку.
+    Поддерживаются операции insert, update, delete и alter (изменение схемы:
+    значения по умолчанию добавленных столбцов подставляются здесь,
+    при чтении, а не перезаписью файлов таблицы).
+    Удалённые записи вычищаются одним проходом в конце или раньше,
+    если журнал снова вставляет запись с удалённым ID.
+    """
+    columnar = isinstance(data, ColumnTable)
+    by_id = None if columnar else {row[ID_COL]: row for row in data}
+    deleted = set()
+
+    def purge(data):
+        if columnar:
+            data.remove_ids(deleted)
+        else:
+            data = [row for row in data if row[ID_COL] not in deleted]
+        deleted.clear()
+        return data
+
+    for record in records:
+        op = record["op"]
+        if op == "insert":
+            if "row" in record:  # запись журнала прежнего формата
+                rows = [record["row"]]
+            else:
+                names = record["columns"]
+                rows = [dict(zip(names, values)) for values in record["rows"]]
+            if deleted and any(row[ID_COL] in deleted for row in rows):
+                data = purge(data)
+            for row in rows:
+                data.append(row)
+                if by_id is not None:
+                    by_id[row[ID_COL]] = row
+        elif op == "update":
+            for row_id in record["ids"]:
+                if row_id in deleted:
+                    continue
+                if columnar:
+                    data[data.position(row_id)].update(record["set"])
+                else:
+                    by_id[row_id].update(record["set"])
+        elif op == "delete":
+            for row_id in record["ids"]:
+                if by_id is not None:
+                    by_id.pop(row_id, None)
+                deleted.add(row_id)
+        elif op == "alter":
+            apply_alter(data, record)
+    if deleted:
+        data = purge(data)
+    return data
+
 
+def snapshot_generation(table_name):
+    """
+    Возвращает поколение снимка таблицы (0, если снимка нет или он записан
+    прежней версией). Снимок поколения N содержит все изменения из журналов
+    поколений меньше N; журнал начинается строкой {"op": "log",
+    "generation": N} с поколением снимка, поверх которого он ведётся.
+    Журнал, оставшийся от сбоя между записью снимка и удалением журнала,
+    имеет меньшее поколение, и при загрузке он пропускается.
+    """
+    generation = 0
+    for fmt in TABLE_FORMATS:
+        path = table_path(table_name, fmt)
+        try:
+            if fmt == "binary":
+                header = binfmt.read_header(path)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    line = f.readline()
+                # Первая строка снимка: {"columns":[...],"generation":N,"rows":[
+                header = json.loads(line + "]}") if line.startswith("{") else {}
+        except FileNotFoundError:
+            continue
+        generation = max(generation, header.get("generation", 0))
+    return generation
+
+
+def _log_generation(table_name):
+    """Возвращает поколение журнала таблицы по его первой строке или None."""
+    try:
+        with open(log_path(table_name), "r", encoding="utf-8") as f:
+            line = f.readline()
+    except FileNotFoundError:
+        return None
+    if line.startswith('{"op":"log"'):
+        return json.loads(line)["generation"]
+    return 0
 
-def load_table_data(table_name):
+
+def _read_log(table_name):
+    """
+    Читает журнал таблицы: возвращает (поколение, записи, длина) или None,
+    если журнала нет. Длина — число байт целых записей: дописывание
+    в журнал не атомарно, и последняя строка, оборванная сбоем (без перевода
+    строки или не разбираемая), в записи не попадает. Испорченная строка
+    в середине журнала — ошибка ValueError.
     """
-    Загружает данные таблицы table_name из JSON-файла.
-    Возвращает пустой список, если файл не найден.
+    try:
+        with open(log_path(table_name), "rb") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return None
+    records = []
+    size = 0
+    for number, line in enumerate(lines, 1):
+        try:
+            if not line.endswith(b"\n"):
+                raise ValueError("строка оборвана")
+            if line.strip():
+                records.append(json.loads(line))
+        except ValueError as e:
+            if any(rest.strip() for rest in lines[number:]):
+                raise ValueError(
+                    f"Журнал таблицы {table_name} повреждён в строке {number}."
+                ) from e
+            break
+        size += len(line)
+    generation = 0
+    if records and records[0]["op"] == "log":
+        generation = records.pop(0)["generation"]
+    return generation, records, size
+
+
+def _rows_from_snapshot(snapshot):
+    """
+    Разбирает JSON-снимок: {"columns": [...], "rows": [[...], ...]}
+    или, в прежнем формате, список записей-словарей.
+    Записи нового формата разделяют строки-ключи из заголовка.
+    """
+    if isinstance(snapshot, list):
+        return snapshot
+    names = snapshot["columns"]
+    return [dict(zip(names, values)) for values in snapshot["rows"]]
+
+
+def _snapshot_values(data, names):
+    """Отдаёт значения записей по столбцам names кортежами, в порядке схемы."""
+    if isinstance(data, ColumnTable):
+        columns = [
+            map(bool, data.data[name]) if data.types[name] == "bool"
+            else data.data[name]
+            for name in names
+        ]
+        return zip(*columns)
+    return ([row[name] for name in names] for row in data)
+
+
+@log_time
+def load_table_data(table_name, table_meta=None, repair=False):
+    """
+    Загружает данные таблицы table_name: снимок в формате из метаданных
+    (JSON-файл или двоичный файл) и журнал изменений, записанный после него.
+    Двоичный снимок загружается в колоночную таблицу.
+    Снимок и журнал читаются под разделяемой блокировкой таблицы, чтобы
+    не застать их посреди сжатия журнала другим процессом.
+    Журнал, уже вошедший в снимок, пропускается, а с repair=True
+    (сессия-писатель) ещё и удаляется, чтобы новые изменения не попали в него.
+    Оборванная сбоем последняя строка журнала пропускается, а с repair=True
+    журнал обрезается до последней целой записи.
+    Возвращает пустой список, если файлов нет.
     """
     os.makedirs(DATA_DIR, exist_ok=True)
-    path = os.path.join(DATA_DIR, f"{table_name}.json")
+    fmt = table_format(table_meta)
+    with locked(table_lock_path(table_name), shared=not repair):
+        try:
+            if fmt == "binary":
+                data = binfmt.load_table(table_path(table_name, fmt))
+            else:
+                with open(table_path(table_name), "r", encoding="utf-8") as f:
+                    data = _rows_from_snapshot(json.load(f))
+        except FileNotFoundError:
+            data = []
+        if metrics.ENABLED:
+            metrics.add(
+                "load_table_data",
+                bytes_read=_file_size(table_path(table_name, fmt))
+                + _file_size(log_path(table_name)),
+                rows_loaded=len(data),
+            )
+        log = _read_log(table_name)
+        if log is None:
+            return data
+        generation, records, size = log
+        if generation < snapshot_generation(table_name):
+            if repair:
+                os.remove(log_path(table_name))
+            return data
+        if repair and size < os.path.getsize(log_path(table_name)):
+            os.truncate(log_path(table_name), size)
+    return replay_log(data, records)
+
+
+@log_time
+def save_table_data(table_name, data, table_meta=None, generation=0):
+    """
+    Сохраняет данные таблицы table_name в JSON-файл или, если так указано
+    в метаданных, в двоичный файл.
+    JSON-снимок хранит имена столбцов один раз в заголовке, а записи —
+    массивами значений без отступов, по записи в строке; записи пишутся
+    по одной, не собирая весь файл в памяти.
+    generation записывается в заголовок снимка (см. snapshot_generation).
+    Файл заменяется атомарно; блокировку таблицы держит вызывающий код.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    fmt = table_format(table_meta)
+    path = table_path(table_name, fmt)
+    if fmt == "binary":
+        binfmt.write_table(
+            path, table_meta["columns"], data,
+            dict_columns=table_meta.get("dict_columns", ()),
+            generation=generation,
+        )
+    else:
+        if table_meta is not None:
+            names = [name for name, _ in table_meta["columns"]]
+        else:
+            names = list(data[0]) if data else [ID_COL]
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        with atomic_write(path) as f:
+            f.write(
+                f'{{"columns":{dumps(names)},"generation":{generation},"rows":['
+            )
+            for i, values in enumerate(_snapshot_values(data, names)):
+                f.write(",\n" if i else "\n")
+                f.write(dumps(values))
+            f.write("\n]}")
+    if metrics.ENABLED:
+        metrics.add("save_table_data", bytes_written=_file_size(path))
+
+
+@log_time
+def append_table_log(table_name, records, fsync=False):
+    """
+    Дописывает записи об изменениях в журнал таблицы table_name.
+    Каждая запись занимает одну строку компактного JSON. Новый журнал
+    начинается строкой с поколением текущего снимка.
+    При fsync=True дожидается записи журнала на диск.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with (
+        locked(table_lock_path(table_name)),
+        open(log_path(table_name), "a", encoding="utf-8") as f,
+    ):
+        start = f.tell()
+        if start == 0:
+            records = [
+                {"op": "log", "generation": snapshot_generation(table_name)},
+                *records,
+            ]
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        if metrics.ENABLED:
+            metrics.add("append_table_log", bytes_written=f.tell() - start)
+
+
+def truncate_table_log(table_name, size):
+    """
+    Обрезает журнал таблицы до size байт, отбрасывая дописанное после.
+    Журнал нулевой длины удаляется.
+    """
+    path = log_path(table_name)
+    with locked(table_lock_path(table_name)):
+        try:
+            if size == 0:
+                os.remove(path)
+            elif os.path.getsize(path) > size:
+                os.truncate(path, size)
+        except FileNotFoundError:
+            pass
+
+
+def save_commit(record):
+    """Атомарно и с fsync записывает запись о фиксации транзакции."""
+    with atomic_write(COMMIT_FILE) as f:
+        json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_commit():
+    """Возвращает незавершённую запись о фиксации транзакции или None."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        with open(COMMIT_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
     except FileNotFoundError:
-        return []
+        return None
 
 
-def save_table_data(table_name, data):
-    """Сохраняет данные таблицы table_name в JSON-файл."""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    path = os.path.join(DATA_DIR, f"{table_name}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+def remove_commit():
+    """Удаляет запись о фиксации после того, как она применена."""
+    try:
+        os.remove(COMMIT_FILE)
+    except FileNotFoundError:
+        pass
+
+
+@log_time
+def compact_table(table_name, data, table_meta=None):
+    """
+    Сворачивает журнал таблицы в новый снимок и удаляет журнал.
+    Снимок получает следующее поколение, поэтому если процесс упадёт
+    до удаления журнала, при загрузке журнал будет пропущен,
+    а не применён к снимку повторно.
+    """
+    with locked(table_lock_path(table_name)):
+        generation = max(
+            snapshot_generation(table_name), _log_generation(table_name) or 0
+        )
+        save_table_data(table_name, data, table_meta, generation + 1)
+        try:
+            os.remove(log_path(table_name))
+        except FileNotFoundError:
+            pass
+
+
+def compact_if_needed(table_name, data, table_meta=None, limit=LOG_COMPACT_SIZE):
+    """
+    Сворачивает журнал таблицы, если его размер превысил limit байт
+    и размер снимка. Второе условие не даёт переписывать большой снимок
+    слишком часто при массовой загрузке.
+    Возвращает True, если сжатие было выполнено.
+    """
+    try:
+        size = os.path.getsize(log_path(table_name))
+    except FileNotFoundError:
+        return False
+    try:
+        snapshot = table_path(table_name, table_format(table_meta))
+        limit = max(limit, os.path.getsize(snapshot))
+    except FileNotFoundError:
+        pass
+    if size < limit:
+        return False
+    compact_table(table_name, data, table_meta)
+    return True
+
+
+def remove_snapshot(table_name, fmt):
+    """Удаляет снимок таблицы table_name в формате fmt, если он есть."""
+    with locked(table_lock_path(table_name)):
+        try:
+            os.remove(table_path(table_name, fmt))
+        except FileNotFoundError:
+            pass
+
+
+def remove_table_data(table_name):
+    """Удаляет снимки во всех форматах и журнал таблицы table_name."""
+    paths = [table_path(table_name, fmt) for fmt in TABLE_FORMATS]
+    with locked(table_lock_path(table_name)):
+        for path in paths + [log_path(table_name)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def batched(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не более size."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _file_format(path):
+    """Определяет формат файла обмена данными по расширению."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(
+        f"Неподдерживаемый формат файла: {path}. Ожидается .csv или .jsonl."
+    )
+
+
+def read_rows(path):
+    """
+    Построчно читает записи из CSV (первая строка — заголовок) или JSON Lines.
+    Возвращает генератор словарей {столбец: значение}; строки JSON Lines
+    могут быть и списками значений без ID.
+    """
+    fmt = _file_format(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def write_rows(path, column_names, rows):
+    """
+    Построчно записывает записи в CSV (с заголовком) или JSON Lines.
+    Записи могут быть словарями или RowView колоночной таблицы; выгружаются
+    столбцы column_names. Файл пишется во временный и подменяется целиком,
+    поэтому ошибка посреди выгрузки не оставляет обрезанный файл.
+    Возвращает количество записанных строк.
+    """
+    fmt = _file_format(path)
+    count = 0
+    with atomic_write(path, newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(column_names)
+            for row in rows:
+                writer.writerow([row.get(name) for name in column_names])
+                count += 1
+        else:
+            dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+            for row in rows:
+                f.write(dumps({name: row.get(name) for name in column_names}))
+                f.write("\n")
+                count += 1
+    return count